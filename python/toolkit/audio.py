@@ -1,27 +1,60 @@
+import contextlib
+import csv
+import json
 import os
 import re
+import shutil
 import subprocess
-
-import ffmpeg  # type: ignore[import-untyped]
-import pyperclip  # type: ignore[import-untyped]
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from pathvalidate import sanitize_filename  # type: ignore[import-untyped]
-from tqdm import tqdm  # type: ignore[import-untyped]
-from unidecode import unidecode  # type: ignore[import-untyped]
-
-from toolkit.cuesheet import process_cue_file
-from toolkit.filesystem import run_command
+from typing import IO, Any, cast
+
+from toolkit.filesystem import (
+    file_digest,
+    map_parallel,
+    materialize_tree,
+    run_command,
+    run_parallel,
+)
+from toolkit.headers import read_header
+from toolkit.instrumentation import instrument, instrumented, wait_child
+from toolkit.jobs import complete, completed
 from toolkit.logging_config import get_logger
+from toolkit.manifest import ConversionManifest
+from toolkit.probe import probe
 
 logger = get_logger("audio")
 
 
 FLAC_44 = [(176400, 24), (88200, 24), (44100, 16)]
 FLAC_48 = [(192000, 24), (96000, 24), (48000, 16)]
+FAN_OUT_CHUNK_SIZE = 1024 * 1024
+PEAK_CACHE_PATH = Path.home() / ".toolkit" / "cache" / "peaks.json"
+PEAK_CACHE_LOCK = threading.Lock()
+ARTWORK_LIMIT_BYTES = 1024 * 1024
+
+
+@dataclass
+class EncodeTarget:
+    """One output of a fan-out: its path, encoder settings and command builder."""
 
+    output: Path
+    settings: str
+    command: Callable[[Path], list[str]]
+    manifest: ConversionManifest
 
+
+@instrumented
 def prepare_directory(directory: Path) -> Path:
     """Sanitize filenames and normalize disc folder names."""
+    from pathvalidate import sanitize_filename  # type: ignore[import-untyped]
+    from unidecode import unidecode  # type: ignore[import-untyped]
 
     def sanitize_name(p: Path) -> Path:
         return p.rename(p.with_name(sanitize_filename(unidecode(p.name)))) or p
@@ -43,24 +76,21 @@ def prepare_directory(directory: Path) -> Path:
     return directory
 
 
+@instrumented
 def create_output_directory(directory: Path, suffix: str) -> Path:
-    """Create output directory with suffix, copying files using robocopy."""
+    """Create output directory with suffix, linking in only the non-audio files."""
     destination = directory.parent / f"{directory.name} [{suffix}]"
-    exclusions = ["*.log", "*.m3u", "*.cue", "*.md5"]
-
-    rc = subprocess.run(
-        ["robocopy", str(directory), str(destination), "/S", "/XF", *exclusions],
-        stdout=subprocess.DEVNULL,
-    ).returncode
+    exclusions = ["*.flac", "*.log", "*.m3u", "*.cue", "*.md5"]
 
-    if rc >= 8:
-        raise RuntimeError(f"Robocopy failed with code {rc}")
+    materialize_tree(directory, destination, exclusions)
 
     return destination
 
 
 def rename_file_red(path: Path) -> None:
     """Rename files with paths exceeding 180 characters for RED compatibility."""
+    import pyperclip  # type: ignore[import-untyped]
+
     if not path.exists() or not path.is_dir():
         logger.error(f"Path does not exist: {path}")
         return
@@ -92,25 +122,48 @@ def rename_file_red(path: Path) -> None:
         logger.info("No files needed renaming")
 
 
-def calculate_image_size(path: Path) -> None:
-    """Report FLAC files with embedded artwork larger than 1MB."""
-    exif_tool = r"C:\Users\Lance\Desktop\exiftool-12.96_64\exiftool.exe"
-    problematic_files: list[Path] = []
+@instrumented
+def calculate_image_size(
+    path: Path, report: Path | None = None, jobs: int = 1
+) -> None:
+    """Report FLAC files with embedded artwork larger than 1MB.
 
-    for flac_file in path.glob("*.flac"):
-        result = subprocess.run(
-            [exif_tool, "-PictureLength", "-s", "-s", "-s", str(flac_file)],
-            capture_output=True,
-            text=True,
-        )
+    Only the metadata blocks of each file are read. With a report path, every
+    file's picture count, dimensions and sizes are written as JSON or CSV.
+    """
+    flac_files = sorted(path.rglob("*.flac"))
+
+    headers = map_parallel(read_header, flac_files, jobs)
+    entries: list[dict[str, Any]] = []
+    problematic_files: list[Path] = []
 
-        if not result.stdout.strip():
+    for flac_file, header in headers:
+        if header is None:
+            logger.warning(f"Unreadable FLAC header: {flac_file}")
             continue
 
-        image_size_kb = round(int(result.stdout.strip()) / 1024, 2)
+        largest = max((p.size for p in header.pictures), default=0)
+        entries.append(
+            {
+                "file": str(flac_file.relative_to(path)),
+                "picture_count": len(header.pictures),
+                "picture_bytes": sum(p.size for p in header.pictures),
+                "largest_picture_bytes": largest,
+                "pictures": [
+                    {
+                        "type": p.picture_type,
+                        "mime_type": p.mime_type,
+                        "width": p.width,
+                        "height": p.height,
+                        "bytes": p.size,
+                    }
+                    for p in header.pictures
+                ],
+            }
+        )
 
-        if image_size_kb > 1024:
-            logger.warning(f"{flac_file.name}: {image_size_kb} KB")
+        if largest > ARTWORK_LIMIT_BYTES:
+            logger.warning(f"{flac_file.name}: {round(largest / 1024, 2)} KB")
             problematic_files.append(flac_file)
 
     if problematic_files:
@@ -118,36 +171,151 @@ def calculate_image_size(path: Path) -> None:
     else:
         logger.info("No files with embedded artwork larger than 1MB")
 
+    if report:
+        write_artwork_report(entries, report)
+        logger.info(f"Artwork report for {len(entries)} files written to {report}")
 
-def process_sacd_directory(directory: Path, fmt: str = "all") -> None:
-    """Extract and convert all SACD ISO files in a directory."""
-    iso_files = list(directory.rglob("*.iso"))
-    output_dirs: list[tuple[Path, int]] = []
 
-    progress_indicator(1, "Converting all ISOs -> DFF + CUE sheets")
+def write_artwork_report(entries: list[dict[str, Any]], report: Path) -> None:
+    """Write artwork audit entries as CSV or, for any other suffix, JSON."""
+    report.parent.mkdir(parents=True, exist_ok=True)
 
-    for disc_number, iso in enumerate(iso_files, 1):
-        dirs = convert_iso_to_dff_and_cue(iso, directory, disc_number)
-        output_dirs.extend((folder, disc_number) for folder in dirs)
+    if report.suffix.lower() != ".csv":
+        report.write_text(json.dumps(entries, indent=2), encoding="utf-8")
+        return
 
-    progress_indicator(2, "CONVERTING DFF + CUE sheet -> FLAC")
+    with open(report, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "file",
+                "picture_count",
+                "picture_bytes",
+                "largest_picture_bytes",
+                "dimensions",
+            ]
+        )
 
-    parent_folders = set(folder.parent for folder, _ in output_dirs)
+        for entry in entries:
+            writer.writerow(
+                [
+                    entry["file"],
+                    entry["picture_count"],
+                    entry["picture_bytes"],
+                    entry["largest_picture_bytes"],
+                    ";".join(f"{p['width']}x{p['height']}" for p in entry["pictures"]),
+                ]
+            )
 
-    for folder, _ in output_dirs:
-        convert_dff_to_flac(folder)
 
-    for parent_folder in parent_folders:
-        convert_audio(3, parent_folder, fmt)
+@instrumented
+def process_sacd_directory(
+    directory: Path,
+    fmt: str = "all",
+    jobs: int = 1,
+    peak_cache: bool = True,
+    extract_jobs: int = 1,
+) -> None:
+    """Extract and convert all SACD ISO files in a directory.
+
+    ISOs are probed in parallel, then extraction (bounded by extract_jobs) and
+    DFF -> FLAC conversion (bounded by jobs) run as a pipeline, so one disc is
+    split while the next is being extracted. Within a queued job, each ISO is
+    checkpointed once all of its folders are converted.
+    """
+    iso_files = sorted(directory.rglob("*.iso"))
+
+    if not iso_files:
+        logger.warning("No ISO files found")
+        return
 
+    converted: list[Path] = []
+    discs: list[tuple[int, Path]] = []
+
+    for disc_number, iso in enumerate(iso_files, 1):
+        if (done := completed("sacd", str(iso))) is not None:
+            converted += [Path(folder) for folder in json.loads(done)]
+        else:
+            discs.append((disc_number, iso))
+
+    if skipped := len(iso_files) - len(discs):
+        logger.info(f"Resuming after {skipped} ISOs converted before")
+
+    progress_indicator(1, f"Probing {len(discs)} ISOs")
+
+    # A disc that fails to probe is logged and left out rather than ending the batch
+    reports = dict(map_parallel(probe_sacd, [iso for _, iso in discs], len(discs)))
+
+    progress_indicator(2, "Extracting ISOs -> DFF + CUE sheets -> FLAC")
+
+    with (
+        ThreadPoolExecutor(max_workers=max(1, extract_jobs)) as extract_pool,
+        ThreadPoolExecutor(max_workers=max(1, jobs)) as convert_pool,
+    ):
+        extractions = {
+            extract_pool.submit(
+                convert_iso_to_dff_and_cue, iso, directory, disc_number, reports[iso]
+            ): iso
+            for disc_number, iso in discs
+            if iso in reports
+        }
+        conversions: dict[Future[None], tuple[Path, Path]] = {}
+        pending: dict[Path, list[Path]] = {}
+
+        for future in as_completed(extractions):
+            iso = extractions[future]
+
+            try:
+                folders = future.result()
+            except Exception as e:
+                logger.error(f"Extraction failed: {iso.name}: {e}")
+                continue
+
+            pending[iso] = list(folders)
+
+            for folder in folders:
+                conversion = convert_pool.submit(
+                    convert_dff_to_flac, folder, peak_cache
+                )
+                conversions[conversion] = (iso, folder)
+
+        for future in as_completed(conversions):
+            iso, folder = conversions[future]
+
+            try:
+                future.result()
+                converted.append(folder)
+            except Exception as e:
+                logger.error(f"Conversion failed: {folder}: {e}")
+                continue
+
+            pending[iso].remove(folder)
+
+            if not pending[iso]:
+                folders = [f for i, f in conversions.values() if i == iso]
+                complete("sacd", str(iso), json.dumps([str(f) for f in folders]))
+
+    for parent_folder in sorted(set(folder.parent for folder in converted)):
+        convert_audio(3, parent_folder, fmt, jobs)
+
+
+def probe_sacd(iso_path: Path) -> str:
+    """Return the sacd_extract disc report for an ISO."""
+    return run_command(
+        ["sacd_extract", "-P", "-i", str(iso_path)], cwd=str(iso_path.parent)
+    )[0]
 
+
+@instrumented
 def convert_iso_to_dff_and_cue(
-    iso_path: Path, base_dir: Path, disc_number: int
+    iso_path: Path, base_dir: Path, disc_number: int, probe_result: str | None = None
 ) -> list[Path]:
-    """Extract stereo and/or multichannel audio from SACD ISO."""
-    probe_result = run_command(
-        ["sacd_extract", "-P", "-i", str(iso_path)], cwd=str(base_dir)
-    )[0]
+    """Extract stereo and/or multichannel audio from SACD ISO.
+
+    Each extraction runs in a private staging folder, so the disc folder it
+    creates is found without diffing a directory shared with other extractions.
+    """
+    probe_result = probe_result or probe_sacd(iso_path)
 
     channel_configs = [
         ("Speaker config: (Stereo|2)", "Stereo", ["-2", "-e", "-c", "-C"]),
@@ -166,154 +334,477 @@ def convert_iso_to_dff_and_cue(
             channel_dir.mkdir(exist_ok=True, parents=True)
 
             output_disc_dir = channel_dir / f"Disc {disc_number:02d}"
-            old_dirs = set(Path(channel_dir).glob("*/"))
+            staging_dir = channel_dir / f".Disc {disc_number:02d}.extract"
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            staging_dir.mkdir()
 
-            run_command(
-                ["sacd_extract", *cmd, "-i", str(iso_path)], cwd=str(channel_dir)
-            )
-            logger.info(f"{suffix} audio extracted from {iso_path.name}")
+            try:
+                run_command(
+                    ["sacd_extract", *cmd, "-i", str(iso_path)], cwd=str(staging_dir)
+                )
+                logger.info(f"{suffix} audio extracted from {iso_path.name}")
+
+                new_dir = next((d for d in staging_dir.iterdir() if d.is_dir()), None)
 
-            new_dirs = set(Path(channel_dir).glob("*/"))
-            new_dir = next(iter(new_dirs - old_dirs), None)
+                if new_dir:
+                    # Left by an interrupted run; a finished one is checkpointed
+                    if output_disc_dir.exists():
+                        logger.warning(f"Replacing partial {output_disc_dir}")
+                        shutil.rmtree(output_disc_dir)
 
-            if new_dir:
-                new_dir.rename(output_disc_dir)
-                out_dirs.append(output_disc_dir)
+                    new_dir.rename(output_disc_dir)
+                    out_dirs.append(output_disc_dir)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
 
     return out_dirs
 
 
-def convert_dff_to_flac(dff_dir: Path) -> None:
-    """Convert DFF files with CUE sheet to FLAC."""
+@instrumented
+def convert_dff_to_flac(
+    dff_dir: Path, peak_cache: bool = True, target_headroom_db: float = -0.5
+) -> None:
+    """Convert DFF files with CUE sheet to FLAC, decoding the DSD stream once.
+
+    Without a cached peak, the DFF is decoded to a float intermediate while its
+    peak is measured, and the tracks are gained and split from that intermediate.
+    """
+    from toolkit.cuesheet import process_cue_file
+
     cue_file = next(dff_dir.rglob("*.cue"))
     dff_file = next(dff_dir.rglob("*.dff"))
 
     if not cue_file.exists():
         raise FileNotFoundError(f"CUE file not found: {cue_file}")
 
-    gain_db = calculate_gain(dff_file)
-    process_cue_file(cue_file, gain_db)
+    cache_keys: list[str] = []
+    peak_db = None
+
+    if peak_cache:
+        # Size and mtime are checked first, so a rerun skips hashing the whole DFF
+        stat = dff_file.stat()
+        cache_keys.append(f"{dff_file.resolve()}:{stat.st_size}:{stat.st_mtime_ns}")
+        peak_db = load_cached_peak(cache_keys[0])
+
+        if peak_db is None:
+            cache_keys.append(file_digest(dff_file))
+            peak_db = load_cached_peak(cache_keys[1])
+
+            if peak_db is not None:
+                store_cached_peak(cache_keys, peak_db)
+
+    if peak_db is not None:
+        logger.info(f"Using cached peak of {peak_db} dB for {dff_file.name}")
+        process_cue_file(cue_file, target_headroom_db - peak_db)
+    else:
+        intermediate = dff_file.with_suffix(".w64")
+
+        try:
+            peak_db = decode_with_peak(dff_file, intermediate)
+
+            if cache_keys:
+                store_cached_peak(cache_keys, peak_db)
+
+            process_cue_file(cue_file, target_headroom_db - peak_db, intermediate)
+        finally:
+            intermediate.unlink(missing_ok=True)
 
     if dff_file.exists():
         dff_file.unlink()
 
 
-def calculate_gain(dff_file: Path, target_headroom_db: float = -0.5) -> float:
-    """Calculate gain adjustment needed for target headroom."""
+def decode_with_peak(dff_file: Path, intermediate: Path) -> float:
+    """Decode a DFF to a 32-bit float W64 intermediate and return its peak in dB.
+
+    The peak is measured by astats on a separate branch, so the intermediate
+    keeps full float precision and peaks above 0 dBFS are not clipped.
+    """
+    import ffmpeg  # type: ignore[import-untyped]
+
+    from toolkit.cuesheet import SPLIT_SAMPLE_RATE
+
     if not dff_file.exists():
         raise FileNotFoundError(f"DFF file not found: {dff_file}")
 
-    peaks: list[float] = []
-
-    _, error = (
+    branches = (
         ffmpeg.input(str(dff_file))
-        .audio.filter("volumedetect")
-        .output("null", format="null")
-        .run(capture_stderr=True)
+        .audio.filter("aresample", SPLIT_SAMPLE_RATE)
+        .filter_multi_output("asplit")
     )
 
+    with instrument("ffmpeg", "tool", stage="decode_with_peak"):
+        _, error = (
+            ffmpeg.merge_outputs(
+                branches[0].output(
+                    str(intermediate), acodec="pcm_f32le", format="w64"
+                ),
+                branches[1].filter("astats").output("-", format="null"),
+            )
+            .overwrite_output()
+            .run(capture_stderr=True)
+        )
+
     if isinstance(error, (bytes, bytearray)):
         error = error.decode("utf-8", errors="ignore")
 
-    if m := re.search(r"max_volume: (-\d+\.?\d*) dB", error):
-        peaks.append(float(m.group(1)))
+    if m := re.search(r"Overall.*?Peak level dB: (-?\d+\.?\d*)", error, re.DOTALL):
+        return float(m.group(1))
 
-    if not peaks:
-        raise RuntimeError("Could not detect peak levels")
+    raise RuntimeError("Could not detect peak levels")
 
-    return target_headroom_db - max(peaks)
 
+def load_cached_peak(key: str) -> float | None:
+    """Return the peak measured earlier for a DFF with this signature or digest."""
+    with PEAK_CACHE_LOCK:
+        if not PEAK_CACHE_PATH.exists():
+            return None
 
-def convert_audio(current_step: int, directory: Path, fmt: str = "all") -> None:
-    """Convert FLAC files to various sample rates and bit depths."""
-    flac_files = list(directory.rglob("*.flac"))
+        peaks: dict[str, float] = json.loads(
+            PEAK_CACHE_PATH.read_text(encoding="utf-8")
+        )
+        return peaks.get(key)
+
+
+def store_cached_peak(keys: list[str], peak_db: float) -> None:
+    """Remember the measured peak for a DFF under each of its keys."""
+    with PEAK_CACHE_LOCK:
+        peaks: dict[str, float] = (
+            json.loads(PEAK_CACHE_PATH.read_text(encoding="utf-8"))
+            if PEAK_CACHE_PATH.exists()
+            else {}
+        )
+        peaks.update(dict.fromkeys(keys, peak_db))
+
+        PEAK_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        PEAK_CACHE_PATH.write_text(json.dumps(peaks, indent=2), encoding="utf-8")
+
+
+@instrumented
+def convert_audio(
+    current_step: int, directory: Path, fmt: str = "all", jobs: int = 1
+) -> None:
+    """Convert FLAC files to various sample rates and bit depths.
+
+    Every file is probed and gets the tiers that suit its own format, so
+    mixed-resolution box sets convert correctly.
+    """
+    flac_files = sorted(directory.rglob("*.flac"))
 
     if not flac_files:
         logger.warning("No FLAC files found")
         return
 
-    bd, sr = next(
-        (int(m["bits_per_raw_sample"]), int(m["sample_rate"]))
-        for f in flac_files
-        if (m := get_metadata(f)) and m["bits_per_raw_sample"] and m["sample_rate"]
+    formats = probe_formats(flac_files, jobs)
+    distribution = Counter(formats.values())
+
+    for (sr, bd), count in sorted(distribution.items()):
+        logger.info(f"{count} of {len(flac_files)} files at {bd}-bit/{sr}Hz")
+
+    if unknown := len(flac_files) - len(formats):
+        logger.warning(f"{unknown} files have no readable sample rate or bit depth")
+
+    file_tiers: dict[Path, list[tuple[int, int]]] = {}
+
+    for f in flac_files:
+        try:
+            file_tiers[f] = get_flac_tiers(*formats[f], fmt) if f in formats else []
+        except ValueError as e:
+            logger.warning(f"{f.name}: {e}")
+            file_tiers[f] = []
+
+    mp3 = fmt in ["mp3", "all"]
+    tiers = sorted({t for ts in file_tiers.values() for t in ts}, reverse=True)
+    targets = [f"{b}-bit/{s}Hz" for s, b in tiers] + (["MP3"] if mp3 else [])
+    sources = ", ".join(f"{b}-bit/{s}Hz" for s, b in sorted(distribution))
+
+    progress_indicator(
+        current_step, f"Converting {directory} from {sources} to {', '.join(targets)}"
     )
+    flac_directory_conversion(directory, file_tiers, mp3, jobs)
 
-    flac_tiers = get_flac_tiers(sr, bd, fmt)
 
-    for i, t in enumerate(flac_tiers, start=current_step):
-        progress_indicator(i, f"Converting {directory} from {bd}-bit/{sr}Hz to {t}")
-        flac_directory_conversion(directory, t)
+@instrumented
+def probe_formats(files: list[Path], jobs: int = 1) -> dict[Path, tuple[int, int]]:
+    """Probe the sample rate and bit depth of every file on a thread pool.
 
-    if fmt in ["mp3", "all"]:
-        progress_indicator(current_step + len(flac_tiers), "Converting FLAC to MP3")
-        convert_to_mp3(directory)
+    Files that cannot be probed are logged and left out.
+    """
+    return {
+        f: (int(m["sample_rate"]), int(m["bits_per_raw_sample"]))
+        for f, m in map_parallel(get_metadata, files, jobs)
+        if m["sample_rate"] and m["bits_per_raw_sample"]
+    }
 
 
-def flac_directory_conversion(directory: Path, tier: tuple[int, int]) -> None:
-    """Convert all FLAC files in directory to specified tier."""
-    sample_rate, bit_depth = tier
-    suffix = f"{bit_depth} - {sample_rate / 1000:.1f}"
+@instrumented
+def flac_directory_conversion(
+    directory: Path,
+    file_tiers: dict[Path, list[tuple[int, int]]],
+    mp3: bool = False,
+    jobs: int = 1,
+) -> list[Path]:
+    """Convert each FLAC file to its tiers and MP3, decoding each source once."""
+    tiers = sorted({t for ts in file_tiers.values() for t in ts}, reverse=True)
+    destinations = {
+        (sr, bd): create_output_directory(directory, f"{bd} - {sr / 1000:.1f}")
+        for sr, bd in tiers
+    }
+    mp3_destination = create_output_directory(directory, "MP3") if mp3 else None
+    flac_files = [f for f, ts in file_tiers.items() if ts or mp3_destination]
+
+    for tier in tiers:
+        if (count := sum(tier in ts for ts in file_tiers.values())) < len(file_tiers):
+            logger.warning(
+                f"{tier[1]}-bit/{tier[0]}Hz covers {count} of {len(file_tiers)} files"
+            )
+
+    if not flac_files:
+        logger.warning("Nothing to convert")
+        return []
 
-    destination = create_output_directory(directory, suffix)
+    manifests = {
+        destination: ConversionManifest(destination)
+        for destination in [*destinations.values(), mp3_destination]
+        if destination
+    }
+    skipped: list[Path] = []
+
+    def convert(source: Path) -> None:
+        relative = source.relative_to(directory)
+        targets: list[EncodeTarget] = []
+
+        for tier in file_tiers[source]:
+            sample_rate, bit_depth = tier
+            targets.append(
+                EncodeTarget(
+                    output=destinations[tier] / relative,
+                    settings=f"sox -b {bit_depth} -R -G rate -v -L {sample_rate}",
+                    command=partial(tier_command, tier=tier),
+                    manifest=manifests[destinations[tier]],
+                )
+            )
 
-    flac_files = list(destination.rglob("*.flac"))
+        if mp3_destination:
+            targets.append(
+                EncodeTarget(
+                    output=(mp3_destination / relative).with_suffix(".mp3"),
+                    settings="libmp3lame 320k",
+                    command=partial(mp3_command, source),
+                    manifest=manifests[mp3_destination],
+                )
+            )
 
-    for f in tqdm(flac_files, desc=f"Converting to {bit_depth}-bit/{sample_rate} Hz"):
-        downsample_flac(f, tier)
+        digest = next(
+            (d for t in targets if (d := t.manifest.source_digest(source))), None
+        ) or file_digest(source)
+        pending = [
+            t
+            for t in targets
+            if not t.manifest.is_current(t.output, digest, t.settings)
+        ]
+
+        if not pending:
+            skipped.append(source)
+            return
+
+        started = time.perf_counter()
+
+        with instrument("fan-out", "tool", file=str(relative), targets=len(pending)):
+            fan_out(source, pending)
+
+        elapsed = time.perf_counter() - started
+
+        for target in pending:
+            target.manifest.record(target.output, source, digest, target.settings)
+
+        if (header := read_header(source)) and header.duration and elapsed:
+            audio_seconds.append(header.duration)
+            logger.info(
+                f"{relative}: {header.duration / elapsed:.1f}x realtime",
+                extra={
+                    "data": {
+                        "stage": "encode",
+                        "file": str(relative),
+                        "format": f"{header.bit_depth}-bit/{header.sample_rate}Hz",
+                        "targets": len(pending),
+                        "audio_seconds": round(header.duration, 3),
+                        "wall_seconds": round(elapsed, 3),
+                        "realtime_factor": round(header.duration / elapsed, 2),
+                    }
+                },
+            )
 
+    audio_seconds: list[float] = []
+    started = time.perf_counter()
+
+    try:
+        failures = run_parallel(
+            convert,
+            flac_files,
+            jobs,
+            f"Converting to {len(tiers) + bool(mp3)} target(s) with {jobs} worker(s)",
+        )
+    finally:
+        for manifest in manifests.values():
+            manifest.save()
+
+    elapsed = time.perf_counter() - started
+
+    if audio_seconds:
+        logger.info(
+            f"Converted {sum(audio_seconds) / 60:.1f} min of audio in "
+            f"{elapsed:.1f}s ({sum(audio_seconds) / elapsed:.1f}x realtime)"
+        )
+
+    if skipped:
+        logger.info(f"{len(skipped)} of {len(flac_files)} files already up to date")
+
+    if failures:
+        logger.error(f"{len(failures)} of {len(flac_files)} files failed")
+
+    return [file for file, _ in failures]
 
-def downsample_flac(file: Path, tier: tuple[int, int]) -> None:
-    """Downsample a single FLAC file using SoX."""
-    sample_rate, bit_depth = tier
-    temp_a = file.with_name("a.flac")
-    temp_b = file.with_name("b.flac")
 
-    file.rename(temp_a)
+@instrumented
+def convert_to_mp3(directory: Path, jobs: int = 1) -> list[Path]:
+    """Convert all FLAC files in directory to 320kbps MP3, keeping the tree."""
+    flac_files = sorted(directory.rglob("*.flac"))
 
-    cmd = [
+    if not flac_files:
+        raise FileNotFoundError("No FLAC files found")
+
+    return flac_directory_conversion(directory, {f: [] for f in flac_files}, True, jobs)
+
+
+def tier_command(output: Path, tier: tuple[int, int]) -> list[str]:
+    """Build a SoX command resampling a piped SoX stream to a FLAC tier."""
+    sample_rate, bit_depth = tier
+
+    return [
         "sox",
-        "-S",
-        str(temp_a),
+        "-t",
+        "sox",
+        "-",
         "-b",
         str(bit_depth),
         "-R",
         "-G",
-        str(temp_b),
+        str(output),
         "rate",
         "-v",
         "-L",
         str(sample_rate),
     ]
 
-    run_command(cmd)
-    temp_a.unlink()
-    temp_b.rename(file)
 
+def mp3_command(source: Path, output: Path) -> list[str]:
+    """Build an ffmpeg command encoding a piped SoX stream to 320kbps MP3.
 
-def convert_to_mp3(directory: Path) -> None:
-    """Convert all FLAC files in directory to 320kbps MP3."""
-    flac_files = list(directory.rglob("*.flac"))
+    Tags and artwork are taken from the source header without decoding it again.
+    """
+    return [
+        "ffmpeg",
+        "-v",
+        "error",
+        "-y",
+        "-f",
+        "sox",
+        "-i",
+        "pipe:0",
+        "-i",
+        str(source),
+        "-map",
+        "0:a",
+        "-map",
+        "1:v?",
+        "-map_metadata",
+        "1",
+        "-c:a",
+        "libmp3lame",
+        "-b:a",
+        "320k",
+        "-c:v",
+        "copy",
+        "-f",
+        "mp3",
+        str(output),
+    ]
 
-    if not flac_files:
-        raise FileNotFoundError("No FLAC files found")
 
-    destination = create_output_directory(directory, "MP3")
+def fan_out(source: Path, targets: list[EncodeTarget]) -> None:
+    """Decode source once with SoX and stream the PCM into every encoder.
 
-    for f in tqdm(flac_files, desc="Converting to MP3"):
-        output = destination / f.with_suffix(".mp3").name
+    Each encoder writes a hidden partial file that is renamed over its output
+    only once every encoder has succeeded, so outputs are never half-written.
+    """
+    processes: list[subprocess.Popen[bytes]] = []
+    partials = [
+        t.output.with_name(f".{t.output.stem}.partial{t.output.suffix}")
+        for t in targets
+    ]
 
-        (
-            ffmpeg.input(str(f))
-            .output(
-                str(output), acodec="libmp3lame", audio_bitrate="320k", format="mp3"
-            )
-            .run(quiet=True)
+    for target in targets:
+        target.output.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        decoder = subprocess.Popen(
+            ["sox", str(source), "-t", "sox", "-"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
         )
+        processes.append(decoder)
+
+        for target, partial_output in zip(targets, partials):
+            processes.append(
+                subprocess.Popen(
+                    target.command(partial_output),
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                )
+            )
+
+        encoders = processes[1:]
+        stream = cast(IO[bytes], decoder.stdout)
+
+        try:
+            while chunk := stream.read(FAN_OUT_CHUNK_SIZE):
+                for encoder in encoders:
+                    cast(IO[bytes], encoder.stdin).write(chunk)
+        except BrokenPipeError:
+            decoder.kill()
+
+        for process in [*encoders, decoder]:
+            if process.stdin:
+                with contextlib.suppress(BrokenPipeError):
+                    process.stdin.close()
+
+            error = cast(IO[bytes], process.stderr).read()
+            wait_child(process)
+
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(
+                    process.returncode,
+                    process.args,
+                    stderr=error.decode("utf-8", errors="ignore"),
+                )
+
+        for target, partial_output in zip(targets, partials):
+            os.replace(partial_output, target.output)
+    except BaseException:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+        for partial_output in partials:
+            partial_output.unlink(missing_ok=True)
+
+        raise
 
 
 def progress_indicator(step: int, message: str) -> None:
     """Print a step indicator with terminal-width borders."""
-    terminal_width = os.get_terminal_size().columns
+    terminal_width = shutil.get_terminal_size().columns
     border = "=" * terminal_width
     core = f"STEP {step}: {message}"
 
@@ -321,8 +812,14 @@ def progress_indicator(step: int, message: str) -> None:
 
 
 def get_metadata(file: Path) -> dict[str, str | None]:
-    """Extract audio metadata from a file using ffprobe."""
-    probe_result = ffmpeg.probe(str(file))
+    """Extract audio metadata from a FLAC/DSDIFF header, or via ffprobe otherwise."""
+    if header := read_header(file):
+        return {
+            "bits_per_raw_sample": str(header.bit_depth),
+            "sample_rate": str(header.sample_rate),
+        }
+
+    probe_result = probe(file)
     audio_stream = next(
         stream
         for stream in probe_result.get("streams", [])
@@ -0,0 +1,304 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from rich.console import Console  # type: ignore[import-untyped]
+from rich.table import Table  # type: ignore[import-untyped]
+
+from toolkit.audio import convert_dff_to_flac, flac_directory_conversion, get_flac_tiers
+from toolkit.cuesheet import process_cue_file
+from toolkit.filesystem import link_or_copy, run_command
+from toolkit.logging_config import flush_logging, get_logger
+
+logger = get_logger("benchmark")
+
+
+SAMPLE_RATES = [44100, 48000, 88200, 96000, 176400, 192000]
+DSD_SAMPLE_RATE = 2822400
+
+
+@dataclass
+class StageResult:
+    """Timing and resource usage of one pipeline stage on one fixture."""
+
+    stage: str
+    fixture: str
+    audio_seconds: float
+    wall_seconds: float
+    cpu_seconds: float
+    realtime_factor: float
+    # Largest single-process peak in the stage's tree, not the tree's sum
+    peak_rss_mib: float
+    succeeded: bool
+
+
+def run_benchmarks(
+    output: Path,
+    seconds: int = 60,
+    tracks: int = 4,
+    signal: str = "sine",
+    compare: Path | None = None,
+) -> list[StageResult]:
+    """Time every audio pipeline stage on synthetic fixtures and save the results."""
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Benchmarks need os.fork and os.wait4 (Linux or macOS)")
+
+    results: list[StageResult] = []
+
+    with tempfile.TemporaryDirectory(prefix="toolkit-bench-") as workdir:
+        for sample_rate in SAMPLE_RATES:
+            fixture = Path(workdir) / f"{sample_rate}" / "image.flac"
+            make_flac_fixture(fixture, sample_rate, 24, seconds, signal)
+            write_cue_sheet(fixture, seconds, tracks)
+
+            try:
+                tiers = get_flac_tiers(sample_rate, 24)
+            except ValueError:
+                tiers = []
+
+            name = f"24-bit/{sample_rate}Hz"
+            results.append(
+                measure(
+                    "convert",
+                    name,
+                    seconds,
+                    lambda f=fixture, t=tiers: flac_directory_conversion(
+                        f.parent, {f: t}, True, 1
+                    ),
+                )
+            )
+            results.append(
+                measure(
+                    "split",
+                    name,
+                    seconds,
+                    lambda f=fixture: process_cue_file(f.with_suffix(".cue")),
+                )
+            )
+
+        dff = Path(workdir) / "dsd" / "image.dff"
+        make_dff_fixture(dff, seconds)
+        write_cue_sheet(dff, seconds, tracks)
+        results.append(
+            measure(
+                "dsd",
+                f"DSD64/{DSD_SAMPLE_RATE}Hz",
+                seconds,
+                lambda: run_dsd_stage(dff),
+            )
+        )
+
+    save_results(results, output)
+    print_results(results, load_results(compare) if compare else None)
+
+    return results
+
+
+def measure(
+    stage: str, fixture: str, audio_seconds: float, run: Callable[[], object]
+) -> StageResult:
+    """Run a stage in a forked child and measure its process tree.
+
+    os.wait4 reports the CPU time of the child together with every encoder it
+    reaped, which getrusage in this process cannot attribute to a single
+    stage. Its peak RSS is the largest peak of any one process in that tree,
+    not of the processes combined.
+    """
+    logger.info(f"Benchmarking {stage} on {fixture}")
+    started = time.perf_counter()
+    pid = os.fork()
+
+    if pid == 0:
+        status = 0
+
+        try:
+            run()
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            flush_logging()
+            os._exit(status)
+
+    _, status, usage = os.wait4(pid, 0)
+    wall_seconds = time.perf_counter() - started
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+
+    result = StageResult(
+        stage=stage,
+        fixture=fixture,
+        audio_seconds=audio_seconds,
+        wall_seconds=round(wall_seconds, 3),
+        cpu_seconds=round(usage.ru_utime + usage.ru_stime, 3),
+        realtime_factor=round(audio_seconds / wall_seconds, 2),
+        peak_rss_mib=round(usage.ru_maxrss * rss_unit / (1024 * 1024), 1),
+        succeeded=os.waitstatus_to_exitcode(status) == 0,
+    )
+    logger.info(
+        f"{stage} on {fixture}: {wall_seconds:.2f}s", extra={"data": asdict(result)}
+    )
+
+    return result
+
+
+def run_dsd_stage(dff: Path) -> None:
+    """Convert a linked copy of the DFF fixture, since conversion deletes its input."""
+    work_dir = dff.parent / "run"
+    work_dir.mkdir(exist_ok=True)
+    link_or_copy(dff, work_dir / dff.name)
+    link_or_copy(dff.with_suffix(".cue"), work_dir / f"{dff.stem}.cue")
+    convert_dff_to_flac(work_dir, peak_cache=False)
+
+
+def make_flac_fixture(
+    path: Path, sample_rate: int, bit_depth: int, seconds: int, signal: str = "sine"
+) -> None:
+    """Synthesize a stereo FLAC of a 1 kHz sine or pink noise with SoX."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    generator = ["sine", "1000"] if signal == "sine" else ["pinknoise"]
+
+    run_command(
+        [
+            "sox",
+            "-n",
+            "-r",
+            str(sample_rate),
+            "-b",
+            str(bit_depth),
+            "-c",
+            "2",
+            str(path),
+            "synth",
+            str(seconds),
+            *generator,
+            "vol",
+            "0.5",
+        ]
+    )
+
+
+def make_dff_fixture(path: Path, seconds: int, channels: int = 2) -> None:
+    """Write an uncompressed DSDIFF file of random DSD64 bits."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sound_bytes = seconds * DSD_SAMPLE_RATE // 8 * channels
+
+    def chunk(chunk_id: bytes, data: bytes) -> bytes:
+        padding = b"\0" if len(data) % 2 else b""
+        return chunk_id + len(data).to_bytes(8, "big") + data + padding
+
+    channel_ids = b"".join([b"SLFT", b"SRGT", b"C   ", b"LFE ", b"LS  ", b"RS  "])
+    properties = b"SND " + b"".join(
+        [
+            chunk(b"FS  ", DSD_SAMPLE_RATE.to_bytes(4, "big")),
+            chunk(b"CHNL", channels.to_bytes(2, "big") + channel_ids[: 4 * channels]),
+            chunk(b"CMPR", b"DSD " + bytes([14]) + b"not compressed" + b"\0"),
+        ]
+    )
+    header = chunk(b"FVER", bytes([1, 5, 0, 0])) + chunk(b"PROP", properties)
+    form_size = 4 + len(header) + 12 + sound_bytes
+
+    with open(path, "wb") as f:
+        f.write(b"FRM8" + form_size.to_bytes(8, "big") + b"DSD " + header)
+        f.write(b"DSD " + sound_bytes.to_bytes(8, "big"))
+
+        for _ in range(sound_bytes // (1024 * 1024)):
+            f.write(os.urandom(1024 * 1024))
+        f.write(os.urandom(sound_bytes % (1024 * 1024)))
+
+
+def write_cue_sheet(image: Path, seconds: int, tracks: int) -> None:
+    """Write a CUE sheet splitting image into equal-length tracks."""
+    lines = [
+        'PERFORMER "Toolkit Benchmark"',
+        f'TITLE "{image.parent.name}"',
+        f'FILE "{image.name}" WAVE',
+    ]
+
+    for number in range(1, tracks + 1):
+        frames = round((number - 1) * seconds / tracks * 75)
+        minutes, remainder = divmod(frames, 60 * 75)
+        lines += [
+            f"  TRACK {number:02d} AUDIO",
+            f'    TITLE "Track {number:02d}"',
+            f"    INDEX 01 {minutes:02d}:{remainder // 75:02d}:{remainder % 75:02d}",
+        ]
+
+    image.with_suffix(".cue").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def save_results(results: list[StageResult], output: Path) -> None:
+    """Write results with the commit and machine they were measured on."""
+    try:
+        commit = run_command(["git", "rev-parse", "--short", "HEAD"])[0].strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "created": datetime.now(timezone.utc).isoformat(),
+                "commit": commit,
+                "machine": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "results": [asdict(r) for r in results],
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    logger.info(f"Benchmark results written to {output}")
+
+
+def load_results(path: Path) -> list[StageResult]:
+    """Load results saved by an earlier benchmark run."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return [StageResult(**r) for r in data["results"]]
+
+
+def print_results(
+    results: list[StageResult], baseline: list[StageResult] | None = None
+) -> None:
+    """Print results as a table, with wall-time change against a baseline."""
+    previous = {(r.stage, r.fixture): r for r in baseline or []}
+    table = Table(
+        title="Audio pipeline benchmark",
+        caption="Peak RSS is the largest single-process peak in each stage",
+    )
+
+    for column in ["Stage", "Fixture", "Wall (s)", "CPU (s)", "RTF", "Peak RSS (MiB)"]:
+        table.add_column(column)
+
+    if baseline:
+        table.add_column("vs baseline")
+
+    for r in results:
+        row = [
+            r.stage,
+            r.fixture,
+            f"{r.wall_seconds:.2f}" if r.succeeded else "failed",
+            f"{r.cpu_seconds:.2f}",
+            f"{r.realtime_factor:.1f}x",
+            f"{r.peak_rss_mib:.1f}",
+        ]
+
+        if baseline:
+            old = previous.get((r.stage, r.fixture))
+            row.append(
+                f"{(r.wall_seconds / old.wall_seconds - 1) * 100:+.1f}%"
+                if old and old.wall_seconds
+                else "-"
+            )
+
+        table.add_row(*row)
+
+    Console().print(table)
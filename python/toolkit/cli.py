@@ -1,35 +1,76 @@
+import os
+import sys
+from datetime import datetime
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Literal
 
 import typer
-from rich.console import Console
 
 from toolkit.logging_config import get_logger
 
 
+# Mirrors toolkit.logs.LEVELS, which is imported lazily
+LogLevel = Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+# Plain help and tracebacks keep typer from importing rich on every startup
 app = typer.Typer(
     name="toolkit",
     help="Personal toolkit for audio, video, and file operations.",
     no_args_is_help=True,
+    rich_markup_mode=None,
+    pretty_exceptions_enable=False,
 )
 audio_app = typer.Typer(
-    help="Audio conversion and processing tools", no_args_is_help=True
+    help="Audio conversion and processing tools",
+    no_args_is_help=True,
+    rich_markup_mode=None,
 )
 video_app = typer.Typer(
-    help="Video processing and extraction tools", no_args_is_help=True
+    help="Video processing and extraction tools",
+    no_args_is_help=True,
+    rich_markup_mode=None,
 )
 filesystem_app = typer.Typer(
-    help="Filesystem operations and torrent creation", no_args_is_help=True
+    help="Filesystem operations and torrent creation",
+    no_args_is_help=True,
+    rich_markup_mode=None,
+)
+daemon_app = typer.Typer(
+    help="Background daemon that keeps the toolkit loaded",
+    no_args_is_help=True,
+    rich_markup_mode=None,
+)
+jobs_app = typer.Typer(
+    help="Persistent queue for long-running commands",
+    no_args_is_help=True,
+    rich_markup_mode=None,
 )
 
 app.add_typer(audio_app, name="audio")
 app.add_typer(video_app, name="video")
 app.add_typer(filesystem_app, name="filesystem")
+app.add_typer(daemon_app, name="daemon")
+app.add_typer(jobs_app, name="jobs")
 
-console = Console()
 logger = get_logger()
 
 
+@app.callback()
+def main_callback(
+    ctx: typer.Context,
+    startup_profile: Annotated[
+        bool,
+        typer.Option(
+            "--startup-profile", help="Report import time per module for the command"
+        ),
+    ] = False,
+) -> None:
+    """Print where the time went once the command finishes."""
+    from toolkit.instrumentation import print_summary
+
+    ctx.call_on_close(print_summary)
+
+
 @audio_app.command("convert")
 def audio_convert(
     directory: Annotated[
@@ -42,6 +83,20 @@ def audio_convert(
     format: Annotated[
         str, typer.Option("-f", "--format", help="Output format")
     ] = "all",
+    jobs: Annotated[
+        int, typer.Option("-j", "--jobs", help="Parallel conversion workers", min=1)
+    ] = os.cpu_count() or 1,
+    peak_cache: Annotated[
+        bool,
+        typer.Option(
+            "--peak-cache/--no-peak-cache",
+            help="Reuse SACD peak levels measured on earlier runs",
+        ),
+    ] = True,
+    extract_jobs: Annotated[
+        int,
+        typer.Option("--extract-jobs", help="Concurrent SACD ISO extractions", min=1),
+    ] = 1,
 ) -> None:
     """Convert audio files to various formats or extract SACD ISOs."""
     from toolkit.audio import convert_audio, prepare_directory, process_sacd_directory
@@ -55,15 +110,30 @@ def audio_convert(
 
     match mode:
         case "convert":
-            convert_audio(1, prepared, format)
+            convert_audio(1, prepared, format, jobs)
         case "extract":
-            process_sacd_directory(prepared, format)
+            process_sacd_directory(prepared, format, jobs, peak_cache, extract_jobs)
         case _:
             raise ValueError(f"Unknown mode: {mode}")
 
     logger.info("Processing completed")
 
 
+@audio_app.command("mp3")
+def audio_mp3(
+    directory: Annotated[
+        Path, typer.Option("-d", "--directory", help="Directory containing FLAC files")
+    ] = Path("."),
+    jobs: Annotated[
+        int, typer.Option("-j", "--jobs", help="Parallel MP3 encoders", min=1)
+    ] = os.cpu_count() or 1,
+) -> None:
+    """Convert FLAC files to 320kbps MP3 only."""
+    from toolkit.audio import convert_to_mp3
+
+    convert_to_mp3(directory.resolve(), jobs)
+
+
 @audio_app.command("rename")
 def audio_rename(
     directory: Annotated[
@@ -81,11 +151,20 @@ def audio_art_report(
     directory: Annotated[
         Path, typer.Option("-d", "--directory", help="Directory containing FLAC files")
     ] = Path("."),
+    report: Annotated[
+        Path | None,
+        typer.Option("-r", "--report", help="Write a .json or .csv artwork report"),
+    ] = None,
+    jobs: Annotated[
+        int, typer.Option("-j", "--jobs", help="Parallel header readers", min=1)
+    ] = os.cpu_count() or 1,
 ) -> None:
     """Report embedded artwork sizes in FLAC files."""
     from toolkit.audio import calculate_image_size
 
-    calculate_image_size(directory.resolve())
+    calculate_image_size(
+        directory.resolve(), report.resolve() if report else None, jobs
+    )
 
 
 @video_app.command("remux")
@@ -96,11 +175,17 @@ def video_remux(
     skip_mediainfo: Annotated[
         bool, typer.Option("--skip-mediainfo", help="Skip MediaInfo generation")
     ] = False,
+    extract_jobs: Annotated[
+        int,
+        typer.Option(
+            "--extract-jobs", help="Videos to extract images from concurrently", min=1
+        ),
+    ] = os.cpu_count() or 1,
 ) -> None:
     """Remux DVD/Blu-ray discs to MKV."""
     from toolkit.video import remux_disc
 
-    remux_disc(path.resolve(), not skip_mediainfo)
+    remux_disc(path.resolve(), not skip_mediainfo, extract_jobs)
 
 
 @video_app.command("compress")
@@ -167,21 +252,51 @@ def video_gif(
         Path, typer.Option("-o", "--output", help="Output directory")
     ] = Path.home()
     / "Desktop",
+    dither: Annotated[
+        str,
+        typer.Option(
+            "--dither", help="paletteuse dithering, e.g. sierra2_4a, bayer or none"
+        ),
+    ] = "sierra2_4a",
 ) -> None:
     """Create optimized GIF from video file."""
-    from toolkit.video import create_gif_optimized
+    from toolkit.video import GIF_DITHER_MODES, create_gif_optimized
 
-    create_gif_optimized(input.resolve(), start, duration, max_size, output.resolve())
+    if dither not in GIF_DITHER_MODES:
+        raise typer.BadParameter(
+            f"Dither must be one of {', '.join(GIF_DITHER_MODES)}, not {dither}"
+        )
+
+    create_gif_optimized(
+        input.resolve(), start, duration, max_size, output.resolve(), dither
+    )
 
 
 @video_app.command("thumbnails")
 def video_thumbnails(
-    path: Annotated[Path, typer.Option("-p", "--path", help="Video file")],
+    path: Annotated[
+        Path, typer.Option("-p", "--path", help="Video file or directory")
+    ],
+    jobs: Annotated[
+        int, typer.Option("-j", "--jobs", help="Videos processed concurrently", min=1)
+    ] = os.cpu_count() or 1,
+    output: Annotated[
+        Path, typer.Option("-o", "--output", help="Output directory")
+    ] = Path.home()
+    / "Desktop",
 ) -> None:
-    """Extract thumbnail grid and full-size images from video."""
-    from toolkit.video import extract_images
+    """Extract thumbnail grids and full-size images from videos."""
+    from toolkit.video import VIDEO_EXTENSIONS, extract_images_batch
 
-    extract_images(path.resolve())
+    resolved = path.resolve()
+    video_files = (
+        [resolved]
+        if resolved.is_file()
+        else sorted(
+            f for f in resolved.rglob("*") if f.suffix.lower() in VIDEO_EXTENSIONS
+        )
+    )
+    extract_images_batch(video_files, jobs, output.resolve())
 
 
 @filesystem_app.command("tree")
@@ -240,7 +355,244 @@ def lastfm_update() -> None:
     update_scrobbles()
 
 
+@app.command("benchmark")
+def benchmark(
+    output: Annotated[
+        Path, typer.Option("-o", "--output", help="JSON file for the results")
+    ] = Path("benchmark.json"),
+    compare: Annotated[
+        Path | None,
+        typer.Option("-c", "--compare", help="Earlier results to compare against"),
+    ] = None,
+    seconds: Annotated[
+        int, typer.Option("-s", "--seconds", help="Fixture length in seconds", min=1)
+    ] = 60,
+    tracks: Annotated[
+        int, typer.Option("-t", "--tracks", help="CUE tracks per fixture", min=1)
+    ] = 4,
+    signal: Annotated[
+        str, typer.Option("--signal", help="Fixture signal: sine or noise")
+    ] = "sine",
+) -> None:
+    """Benchmark the audio pipeline on synthetic fixtures."""
+    from toolkit.benchmark import run_benchmarks
+
+    run_benchmarks(
+        output.resolve(),
+        seconds,
+        tracks,
+        signal,
+        compare.resolve() if compare else None,
+    )
+
+
+@app.command("logs")
+def logs(
+    service: Annotated[
+        str, typer.Option("--service", help="Service whose logs to read")
+    ] = "toolkit",
+    session: Annotated[
+        str | None, typer.Option("-s", "--session", help="Session ID or prefix")
+    ] = None,
+    level: Annotated[
+        LogLevel | None,
+        typer.Option(
+            "-l", "--level", help="Minimum level, e.g. WARNING", case_sensitive=False
+        ),
+    ] = None,
+    module: Annotated[
+        str | None, typer.Option("-m", "--module", help="Source module, e.g. audio")
+    ] = None,
+    since: Annotated[
+        datetime | None, typer.Option("--since", help="Only entries at or after")
+    ] = None,
+    until: Annotated[
+        datetime | None, typer.Option("--until", help="Only entries at or before")
+    ] = None,
+    sessions: Annotated[
+        bool, typer.Option("--sessions", help="List sessions instead of entries")
+    ] = False,
+    stats: Annotated[
+        bool,
+        typer.Option("--stats", help="Show per-stage timing percentiles instead"),
+    ] = False,
+    by: Annotated[
+        str | None,
+        typer.Option("--by", help="Split stats by a data field, day or month"),
+    ] = None,
+    raw: Annotated[
+        bool, typer.Option("--json", help="Print matching entries as JSON Lines")
+    ] = False,
+) -> None:
+    """Query the JSON logs written under ~/.toolkit/logs."""
+    from toolkit.logs import (
+        print_entries,
+        print_sessions,
+        print_statistics,
+        query_entries,
+        stage_statistics,
+    )
+
+    if sessions:
+        print_sessions(service)
+        return
+
+    entries = query_entries(service, session, level, module, since, until)
+
+    if stats:
+        print_statistics(stage_statistics(entries, by))
+    else:
+        print_entries(entries, raw)
+
+
+@daemon_app.command("start")
+def daemon_start() -> None:
+    """Run the daemon in the foreground until stopped."""
+    from toolkit.daemon import serve
+
+    serve()
+
+
+@daemon_app.command("stop")
+def daemon_stop() -> None:
+    """Stop a running daemon after its current commands finish."""
+    from toolkit.daemon import stop_daemon
+
+    if stop_daemon():
+        logger.info("Daemon stopping")
+    else:
+        logger.warning("No daemon is running")
+
+
+@daemon_app.command("status")
+def daemon_status() -> None:
+    """Show whether a daemon is running and how many commands it has served."""
+    from toolkit.daemon import SOCKET_PATH, daemon_status
+
+    if status := daemon_status():
+        logger.info(
+            f"Daemon {status['pid']} on {SOCKET_PATH}: {status['served']} commands "
+            f"served since {datetime.fromtimestamp(status['started']):%Y-%m-%d %H:%M}"
+        )
+    else:
+        logger.info("No daemon is running")
+
+
+@jobs_app.command(
+    "submit",
+    context_settings={
+        "allow_extra_args": True,
+        "allow_interspersed_args": False,
+        "ignore_unknown_options": True,
+    },
+)
+def jobs_submit(
+    ctx: typer.Context,
+    resource: Annotated[
+        str | None,
+        typer.Option("-r", "--resource", help="Concurrency limit to count against"),
+    ] = None,
+    start: Annotated[
+        bool, typer.Option("--start", help="Start a background runner if none is")
+    ] = False,
+) -> None:
+    """Queue a toolkit command, e.g. `toolkit jobs submit audio convert -d X`."""
+    from toolkit.jobs import start_runner, submit_job
+
+    if len(ctx.args) < 1:
+        raise typer.BadParameter("Give the toolkit command to queue")
+
+    job_id = submit_job(ctx.args, Path.cwd(), resource)
+    logger.info(f"Queued job {job_id}: {' '.join(ctx.args)}")
+
+    if start and (pid := start_runner()):
+        logger.info(f"Started job runner {pid}")
+
+
+@jobs_app.command("run")
+def jobs_run(
+    limit: Annotated[
+        list[str] | None,
+        typer.Option("-l", "--limit", help="Resource limit as name=count, e.g. cpu=2"),
+    ] = None,
+    once: Annotated[
+        bool, typer.Option("--once", help="Exit when the queue is empty")
+    ] = False,
+) -> None:
+    """Run queued jobs in the foreground, within the resource limits."""
+    from toolkit.jobs import run_jobs
+
+    limits: dict[str, int] = {}
+
+    for item in limit or []:
+        name, _, count = item.partition("=")
+        if not count.isdigit():
+            raise typer.BadParameter(f"Limit must look like cpu=2, not {item}")
+        limits[name] = int(count)
+
+    run_jobs(limits, once)
+
+
+@jobs_app.command("list")
+def jobs_list() -> None:
+    """List queued, running and finished jobs."""
+    from rich.console import Console  # type: ignore[import-untyped]
+    from rich.table import Table  # type: ignore[import-untyped]
+
+    from toolkit.jobs import list_jobs, runner_pid
+
+    table = Table(title=f"Jobs (runner {runner_pid() or 'not running'})")
+
+    for column in ["ID", "Status", "Resource", "Command", "Submitted", "Checkpoints"]:
+        table.add_column(column)
+
+    for job in list_jobs():
+        table.add_row(
+            str(job.id),
+            job.status if job.exit_code is None else f"{job.status} ({job.exit_code})",
+            job.resource,
+            " ".join(job.args),
+            f"{datetime.fromtimestamp(job.submitted):%Y-%m-%d %H:%M}",
+            str(job.checkpoints),
+        )
+
+    Console().print(table)
+
+
+@jobs_app.command("cancel")
+def jobs_cancel(
+    job_id: Annotated[int, typer.Argument(help="Job to cancel")],
+) -> None:
+    """Cancel a queued job or stop a running one."""
+    from toolkit.jobs import cancel_job
+
+    logger.info(f"Job {job_id} {cancel_job(job_id)}")
+
+
+@jobs_app.command("resume")
+def jobs_resume(
+    job_id: Annotated[int, typer.Argument(help="Job to resume")],
+) -> None:
+    """Queue a failed or cancelled job again from its last checkpoint."""
+    from toolkit.jobs import resume_job
+
+    resume_job(job_id)
+    logger.info(f"Job {job_id} queued again")
+
+
 def main() -> None:
+    # Handled before Typer runs, since imports must be timed from a fresh process
+    if "--startup-profile" in sys.argv[1:]:
+        from toolkit.instrumentation import profile_startup
+
+        args = [a for a in sys.argv[1:] if a != "--startup-profile"]
+        sys.exit(profile_startup(args))
+
+    from toolkit.daemon import forward
+
+    if (code := forward(sys.argv[1:])) is not None:
+        sys.exit(code)
+
     app()
 
 
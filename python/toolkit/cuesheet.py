@@ -8,6 +8,12 @@ from deflacue.deflacue import CueParser  # type: ignore[import-untyped]
 from pathvalidate import sanitize_filename  # type: ignore[import-untyped]
 from tqdm import tqdm  # type: ignore[import-untyped]
 
+from toolkit.headers import read_header
+from toolkit.instrumentation import instrument, instrumented
+from toolkit.probe import probe
+
+SPLIT_SAMPLE_RATE = 88200
+
 
 @dataclass
 class TrackInfo:
@@ -63,8 +69,12 @@ def calculate_track_durations(
     p = Path(tracks[0].file)
     file = (cue_file.parent / p if not p.is_absolute() else p).resolve()
 
-    probe_result: dict[str, Any] = ffmpeg.probe(str(file))
-    total_duration = float(probe_result["format"]["duration"])
+    header = read_header(file)
+    total_duration = (
+        header.duration
+        if header and header.total_samples
+        else float(probe(file)["format"]["duration"])
+    )
 
     for i, track in enumerate(tracks[:-1]):
         track.duration = tracks[i + 1].start_sec - track.start_sec
@@ -74,18 +84,46 @@ def calculate_track_durations(
 
 
 def process_tracks(
-    tracks: list[TrackInfo], cue_file: Path, volume_adjustment: float = 0.0
+    tracks: list[TrackInfo],
+    cue_file: Path,
+    volume_adjustment: float = 0.0,
+    source: Path | None = None,
 ) -> None:
-    """Extract individual FLAC files from CUE sheet with volume adjustment."""
-    track_count = len(tracks)
+    """Split a CUE image into FLAC tracks in a single decode with volume adjustment.
+
+    The image named in the CUE sheet is used unless another source is given.
+    """
     cue_directory = cue_file.parent
+    p = Path(tracks[0].file)
+    source = source or (cue_directory / p if not p.is_absolute() else p).resolve()
+    first_start = tracks[0].start_sec
+
+    stream: Any = (
+        ffmpeg.input(str(source))
+        .audio.filter("volume", volume=f"{volume_adjustment}dB")
+        .filter("aresample", SPLIT_SAMPLE_RATE)
+    )
+
+    if first_start:
+        stream = stream.filter(
+            "atrim", start_sample=round(first_start * SPLIT_SAMPLE_RATE)
+        )
 
-    for track in tqdm(
-        tracks, total=track_count, desc=f"Converting {cue_file.parent.name}"
-    ):
+    boundaries = [
+        str(round((track.start_sec - first_start) * SPLIT_SAMPLE_RATE))
+        for track in tracks[1:]
+    ]
+    segments: Any = (
+        stream.filter_multi_output("asegment", samples="|".join(boundaries))
+        if boundaries
+        else None
+    )
+
+    outputs: list[Any] = []
+
+    for index, track in enumerate(tracks):
         track_number = str(track.track_num).rjust(2, "0")
         output_filename = f"{track_number}. {sanitize_filename(track.title)}.flac"
-        output_path = cue_directory / output_filename
 
         metadata_mappings: dict[str, str | int | None] = {
             "title": track.title,
@@ -96,29 +134,44 @@ def process_tracks(
             "date": track.metadata.get("DATE"),
         }
 
-        metadata = [f"{k}={v}" for k, v in metadata_mappings.items() if v]
-
-        p = Path(track.file)
-        stream: Any = ffmpeg.input(
-            str((cue_file.parent / p if not p.is_absolute() else p).resolve()),
-            ss=f"{track.start_sec:.6f}",
-        )
-        (
-            stream.audio.filter("volume", volume=f"{volume_adjustment}dB")
-            .output(
-                str(output_path),
-                t=f"{track.duration:.6f}" if track.duration else "0",
+        outputs.append(
+            (segments[index] if segments else stream).output(
+                str(cue_directory / output_filename),
                 acodec="flac",
                 sample_fmt="s32",
-                ar="88200",
-                metadata=metadata,
+                metadata=[f"{k}={v}" for k, v in metadata_mappings.items() if v],
             )
-            .global_args("-y", "-loglevel", "error")
-            .run()
         )
 
+    with (
+        instrument("ffmpeg", "tool", stage="process_tracks", tracks=len(tracks)),
+        tqdm(
+            total=round(sum(track.duration or 0 for track in tracks)),
+            unit="s",
+            desc=f"Splitting {cue_directory.name} into {len(tracks)} tracks",
+        ) as progress,
+    ):
+        process = (
+            ffmpeg.merge_outputs(*outputs)
+            .global_args("-y", "-loglevel", "error", "-nostats", "-progress", "pipe:1")
+            .run_async(pipe_stdout=True)
+        )
+
+        for line in process.stdout:
+            key, _, value = line.decode("utf-8", errors="ignore").strip().partition("=")
 
-def process_cue_file(cue_file: Path, volume_adjustment: float = 0.0) -> None:
+            if key == "out_time_ms" and value.isdigit():
+                elapsed = min(int(value) // 1_000_000, progress.total)
+                progress.update(elapsed - progress.n)
+
+        if process.wait() != 0:
+            raise ffmpeg.Error("ffmpeg", None, None)
+
+
+@instrumented
+def process_cue_file(
+    cue_file: Path, volume_adjustment: float = 0.0, source: Path | None = None
+) -> None:
     """Process a CUE file: parse, extract tracks, and convert to FLAC."""
     cue_file = Path(cue_file).absolute()
 
@@ -128,4 +181,4 @@ def process_cue_file(cue_file: Path, volume_adjustment: float = 0.0) -> None:
     cue_data = parse_cue_file(cue_file)
     tracks = extract_track_data(cue_data)
     tracks = calculate_track_durations(tracks, cue_file)
-    process_tracks(tracks, cue_file, volume_adjustment)
+    process_tracks(tracks, cue_file, volume_adjustment, source)
@@ -0,0 +1,271 @@
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+SOCKET_PATH = Path.home() / ".toolkit" / "daemon.sock"
+WARM_MODULES = [
+    "toolkit.audio",
+    "toolkit.video",
+    "toolkit.filesystem",
+    "toolkit.cuesheet",
+    "toolkit.logs",
+    "ffmpeg",
+    "pyperclip",
+    "tqdm",
+    "unidecode",
+    "pathvalidate",
+    "chardet",
+    "deflacue.deflacue",
+    "PIL.Image",
+    "rich.console",
+    "rich.logging",
+    "rich.table",
+]
+
+
+def is_supported() -> bool:
+    """Check the platform has Unix domain sockets with fd passing and fork."""
+    return (
+        hasattr(socket, "AF_UNIX")
+        and hasattr(socket, "send_fds")
+        and hasattr(os, "fork")
+    )
+
+
+def forward(args: list[str]) -> int | None:
+    """Run a CLI invocation in the daemon and return its exit code.
+
+    The client's stdin, stdout and stderr are handed to the daemon, so output
+    and progress bars reach the terminal directly. Returns None when no daemon
+    is running, so the caller can run the command in-process instead.
+    """
+    if (
+        os.getenv("TOOLKIT_NO_DAEMON")
+        or args[:1] == ["daemon"]
+        or not is_supported()
+        or not SOCKET_PATH.exists()
+    ):
+        return None
+
+    try:
+        client = _connect()
+    except OSError:
+        return None
+
+    with client:
+        request = {"args": args, "cwd": os.getcwd(), "env": dict(os.environ)}
+        socket.send_fds(client, [_encode(request)], [0, 1, 2])
+        reader = client.makefile("r", encoding="utf-8")
+        reply = reader.readline()
+
+        if not reply:
+            return None
+
+        pid = json.loads(reply)["pid"]
+
+        while True:
+            try:
+                reply = reader.readline()
+                return json.loads(reply)["exit"] if reply else 1
+            except KeyboardInterrupt:
+                os.kill(pid, signal.SIGINT)
+
+
+def serve() -> None:
+    """Keep the toolkit imported and run forwarded invocations in forked children."""
+    if not is_supported():
+        raise RuntimeError("The daemon needs Unix domain sockets and os.fork")
+
+    if daemon_status() is not None:
+        raise RuntimeError(f"A daemon is already listening on {SOCKET_PATH}")
+
+    from toolkit.cli import app
+    from toolkit.logging_config import get_logger
+
+    logger = get_logger("daemon")
+
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+    SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    SOCKET_PATH.unlink(missing_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Create the socket owner-only, rather than opening it to others until a chmod
+    umask = os.umask(0o177)
+
+    try:
+        server.bind(str(SOCKET_PATH))
+    finally:
+        os.umask(umask)
+
+    server.listen()
+
+    state: dict[str, Any] = {"pid": os.getpid(), "started": time.time(), "served": 0}
+    handlers: list[threading.Thread] = []
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    logger.info(f"Daemon listening on {SOCKET_PATH}")
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            handler = threading.Thread(
+                target=_handle, args=(conn, server, app, state), daemon=True
+            )
+            handler.start()
+            handlers = [h for h in handlers if h.is_alive()] + [handler]
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        SOCKET_PATH.unlink(missing_ok=True)
+
+        for handler in handlers:
+            handler.join()
+
+        logger.info("Daemon stopped")
+
+
+def daemon_status() -> dict[str, Any] | None:
+    """Return the running daemon's pid, start time and request count, if any."""
+    return _request({"command": "status"})
+
+
+def stop_daemon() -> bool:
+    """Ask a running daemon to exit once its current requests finish."""
+    return _request({"command": "stop"}) is not None
+
+
+def _handle(
+    conn: socket.socket, server: socket.socket, app: Any, state: dict[str, Any]
+) -> None:
+    with conn:
+        request, fds = _receive(conn)
+
+        if request.get("command") == "status":
+            conn.sendall(_encode(state))
+            return
+
+        if request.get("command") == "stop":
+            conn.sendall(_encode(state))
+            os.kill(os.getpid(), signal.SIGTERM)
+            return
+
+        state["served"] += 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+
+        if pid == 0:
+            _run_child(request, fds, [conn, server], app)
+
+        for fd in fds:
+            os.close(fd)
+
+        conn.sendall(_encode({"pid": pid}))
+        _, status = os.waitpid(pid, 0)
+        conn.sendall(_encode({"exit": os.waitstatus_to_exitcode(status)}))
+
+
+def _run_child(
+    request: dict[str, Any], fds: list[int], sockets: list[socket.socket], app: Any
+) -> None:
+    """Become the client's process: its stdio, directory, environment and logs."""
+    from toolkit.logging_config import shutdown_logging, start_child_session
+
+    code = 1
+
+    try:
+        for s in sockets:
+            s.close()
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        start_child_session()
+        app(args=request["args"], prog_name="toolkit")
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException as e:
+        # Report it as the interpreter would have, since os._exit skips that
+        sys.excepthook(type(e), e, e.__traceback__)
+    finally:
+        shutdown_logging()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def _request(message: dict[str, Any]) -> dict[str, Any] | None:
+    if not is_supported() or not SOCKET_PATH.exists():
+        return None
+
+    try:
+        with _connect() as client:
+            client.sendall(_encode(message))
+            reply = client.makefile("r", encoding="utf-8").readline()
+    except OSError:
+        return None
+
+    return json.loads(reply) if reply else None
+
+
+def _connect() -> socket.socket:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        client.connect(str(SOCKET_PATH))
+    except OSError:
+        client.close()
+        raise
+
+    return client
+
+
+def _receive(conn: socket.socket) -> tuple[dict[str, Any], list[int]]:
+    """Read one newline-terminated JSON request and any file descriptors with it."""
+    data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+
+    while data and not data.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+
+    return json.loads(data), fds
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    return json.dumps(message).encode("utf-8") + b"\n"
+
+
+def main() -> None:
+    """Thin client entry point that only imports the CLI when no daemon answers."""
+    code = forward(sys.argv[1:])
+
+    if code is None:
+        from toolkit.cli import main as cli_main
+
+        cli_main()
+    else:
+        sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,41 @@
+import fnmatch
+import hashlib
 import json
+import os
+import shutil
 import subprocess
+import sys
+import tempfile
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import IO, TypeVar
 
-from py3createtorrent import create_torrent  # type: ignore[import-untyped]
-from unidecode import unidecode  # type: ignore[import-untyped]
-
+from toolkit.instrumentation import instrument, instrumented, tool_name, wait_child
 from toolkit.logging_config import get_logger
 
 logger = get_logger("filesystem")
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+FICLONE = 0x40049409
+
 
 def run_command(cmd: list[str], cwd: str | None = None) -> tuple[str, str]:
     """Run a subprocess command and return stdout/stderr."""
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        encoding="utf-8",
-        errors="ignore",
-        cwd=cwd,
-    )
-
-    result, error = process.communicate()
+    from unidecode import unidecode  # type: ignore[import-untyped]
+
+    # Output goes to files rather than pipes, so the child can be reaped with
+    # wait_child once it exits instead of by Popen.communicate
+    with (
+        instrument(tool_name(cmd), "tool"),
+        tempfile.TemporaryFile() as stdout,
+        tempfile.TemporaryFile() as stderr,
+    ):
+        process = subprocess.Popen(cmd, stdout=stdout, stderr=stderr, cwd=cwd)
+        wait_child(process)
+        result, error = _read_output(stdout), _read_output(stderr)
 
     if process.returncode != 0:
         raise subprocess.CalledProcessError(
@@ -32,6 +45,114 @@ def run_command(cmd: list[str], cwd: str | None = None) -> tuple[str, str]:
     return unidecode(result), unidecode(error)
 
 
+def _read_output(file: IO[bytes]) -> str:
+    """Decode captured output with the newline translation of text-mode pipes."""
+    file.seek(0)
+    text = file.read().decode("utf-8", errors="ignore")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def run_parallel(
+    func: Callable[[T], object], items: Sequence[T], jobs: int, desc: str
+) -> list[tuple[T, Exception]]:
+    """Run func over items on a bounded thread pool, collecting per-item failures."""
+    from tqdm import tqdm  # type: ignore[import-untyped]
+
+    failures: list[tuple[T, Exception]] = []
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(func, item): item for item in items}
+
+        try:
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+                item = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed: {item}: {e}")
+                    failures.append((item, e))
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    return failures
+
+
+def map_parallel(
+    func: Callable[[T], R], items: Sequence[T], jobs: int
+) -> list[tuple[T, R]]:
+    """Map func over items on a thread pool, in order, logging and dropping failures."""
+
+    def attempt(item: T) -> tuple[T, R] | None:
+        try:
+            return item, func(item)
+        except Exception as e:
+            logger.error(f"Failed: {item}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return [result for result in pool.map(attempt, items) if result is not None]
+
+
+def file_digest(path: Path) -> str:
+    """Return the BLAKE2b hex digest of a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "blake2b").hexdigest()
+
+
+def link_or_copy(source: Path, destination: Path, hardlink: bool = True) -> None:
+    """Materialize source at destination by reflink, hardlink or copy.
+
+    A hardlink shares the file with source, so an in-place edit of either
+    changes both. Pass hardlink=False for files that may be edited in place.
+    Reflinks are copy-on-write and always safe.
+    """
+    if sys.platform == "linux":
+        import fcntl
+
+        try:
+            with open(source, "rb") as src, open(destination, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return
+        except OSError:
+            destination.unlink(missing_ok=True)
+
+    if hardlink:
+        try:
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+
+    shutil.copy2(source, destination)
+
+
+def materialize_tree(source: Path, destination: Path, exclusions: list[str]) -> None:
+    """Mirror every file of source not matching exclusions into destination.
+
+    Mirrored files are sidecars such as artwork and notes, which are edited in
+    the destination tree independently, so they are reflinked or copied but
+    never hardlinked.
+    """
+    destination.mkdir(parents=True, exist_ok=True)
+
+    for file in source.rglob("*"):
+        name = file.name.lower()
+
+        if not file.is_file() or any(fnmatch.fnmatch(name, p) for p in exclusions):
+            continue
+
+        target = destination / file.relative_to(source)
+
+        if target.exists():
+            if target.stat().st_size == file.stat().st_size:
+                continue
+            target.unlink()
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        link_or_copy(file, target, hardlink=False)
+
+
 def get_folder_size(path: Path) -> int:
     """Calculate total size of all files in a directory recursively."""
     return sum(entry.stat().st_size for entry in path.rglob("*") if entry.is_file())
@@ -115,8 +236,11 @@ def rename_file_red(path: Path) -> None:
     )
 
 
+@instrumented
 def make_torrents(folder: Path) -> None:
     """Create RED and OPS torrents for a folder."""
+    from py3createtorrent import create_torrent  # type: ignore[import-untyped]
+
     logger.info(f"Creating torrents for {folder.name}")
 
     dropbox_info_path = Path.home() / "AppData" / "Local" / "Dropbox" / "info.json"
@@ -0,0 +1,179 @@
+import mmap
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class Picture:
+    """An embedded picture block, described without copying its image data."""
+
+    picture_type: int
+    mime_type: str
+    width: int
+    height: int
+    size: int
+
+
+@dataclass
+class AudioHeader:
+    """Stream properties, tags and pictures read from a FLAC or DSDIFF header."""
+
+    container: str
+    sample_rate: int
+    bit_depth: int
+    channels: int
+    total_samples: int
+    tags: dict[str, str] = field(default_factory=dict)
+    pictures: list[Picture] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.total_samples / self.sample_rate if self.sample_rate else 0.0
+
+
+def read_header(path: Path) -> AudioHeader | None:
+    """Read a FLAC or DSDIFF header, or return None for other or corrupt files."""
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
+    with mm:
+        try:
+            if mm[:4] == b"fLaC" or mm[:3] == b"ID3":
+                return _read_flac(mm)
+            if mm[:4] == b"FRM8" and mm[12:16] == b"DSD ":
+                return _read_dsdiff(mm)
+        except (struct.error, ValueError, UnicodeDecodeError):
+            return None
+
+    return None
+
+
+def _read_flac(mm: mmap.mmap) -> AudioHeader | None:
+    offset = 0
+
+    if mm[:3] == b"ID3":
+        size = mm[6:10]
+        offset = 10 + (size[0] << 21 | size[1] << 14 | size[2] << 7 | size[3])
+
+    if mm[offset : offset + 4] != b"fLaC":
+        return None
+
+    offset += 4
+    header: AudioHeader | None = None
+    last = False
+
+    while not last:
+        block_header = struct.unpack_from(">I", mm, offset)[0]
+        last = bool(block_header >> 31)
+        block_type = (block_header >> 24) & 0x7F
+        length = block_header & 0xFFFFFF
+        offset += 4
+
+        if offset + length > len(mm):
+            raise ValueError("Truncated FLAC metadata block")
+
+        if block_type == 0:
+            packed = int.from_bytes(mm[offset + 10 : offset + 18], "big")
+            header = AudioHeader(
+                container="flac",
+                sample_rate=packed >> 44,
+                channels=((packed >> 41) & 0x7) + 1,
+                bit_depth=((packed >> 36) & 0x1F) + 1,
+                total_samples=packed & 0xFFFFFFFFF,
+            )
+        elif header and block_type == 4:
+            header.tags = _read_vorbis_comment(mm, offset)
+        elif header and block_type == 6:
+            header.pictures.append(_read_picture(mm, offset))
+
+        offset += length
+
+    return header
+
+
+def _read_vorbis_comment(mm: mmap.mmap, offset: int) -> dict[str, str]:
+    tags: dict[str, str] = {}
+    vendor_length = struct.unpack_from("<I", mm, offset)[0]
+    offset += 4 + vendor_length
+    count = struct.unpack_from("<I", mm, offset)[0]
+    offset += 4
+
+    for _ in range(count):
+        length = struct.unpack_from("<I", mm, offset)[0]
+        comment = mm[offset + 4 : offset + 4 + length].decode("utf-8", errors="replace")
+        key, _, value = comment.partition("=")
+        key = key.upper()
+        tags[key] = f"{tags[key]}; {value}" if key in tags else value
+        offset += 4 + length
+
+    return tags
+
+
+def _read_picture(mm: mmap.mmap, offset: int) -> Picture:
+    picture_type, mime_length = struct.unpack_from(">II", mm, offset)
+    mime_type = mm[offset + 8 : offset + 8 + mime_length].decode(
+        "ascii", errors="replace"
+    )
+    offset += 8 + mime_length
+    description_length = struct.unpack_from(">I", mm, offset)[0]
+    offset += 4 + description_length
+    width, height, _, _, size = struct.unpack_from(">IIIII", mm, offset)
+
+    return Picture(picture_type, mime_type, width, height, size)
+
+
+def _read_dsdiff(mm: mmap.mmap) -> AudioHeader | None:
+    sample_rate = channels = total_samples = 0
+    tags: dict[str, str] = {}
+    offset = 16
+
+    for chunk_id, start, size in _iter_chunks(mm, offset, len(mm)):
+        if chunk_id == b"PROP" and mm[start : start + 4] == b"SND ":
+            for prop_id, prop_start, _ in _iter_chunks(mm, start + 4, start + size):
+                if prop_id == b"FS  ":
+                    sample_rate = struct.unpack_from(">I", mm, prop_start)[0]
+                elif prop_id == b"CHNL":
+                    channels = struct.unpack_from(">H", mm, prop_start)[0]
+        elif chunk_id == b"DSD " and channels:
+            total_samples = size * 8 // channels
+        elif chunk_id == b"DST ":
+            for dst_id, dst_start, _ in _iter_chunks(mm, start, start + size):
+                if dst_id == b"FRTE":
+                    frames, frame_rate = struct.unpack_from(">IH", mm, dst_start)
+                    total_samples = frames * sample_rate // frame_rate
+                    break
+        elif chunk_id == b"DIIN":
+            for info_id, info_start, _ in _iter_chunks(mm, start, start + size):
+                if info_id in (b"DIAR", b"DITI"):
+                    length = struct.unpack_from(">I", mm, info_start)[0]
+                    text = mm[info_start + 4 : info_start + 4 + length]
+                    key = "ARTIST" if info_id == b"DIAR" else "TITLE"
+                    tags[key] = text.decode("utf-8", errors="replace")
+
+    if not sample_rate or not channels:
+        return None
+
+    return AudioHeader(
+        container="dsdiff",
+        sample_rate=sample_rate,
+        bit_depth=1,
+        channels=channels,
+        total_samples=total_samples,
+        tags=tags,
+    )
+
+
+def _iter_chunks(
+    mm: mmap.mmap, offset: int, end: int
+) -> Iterator[tuple[bytes, int, int]]:
+    """Yield (id, data offset, data size) for each DSDIFF chunk in a range."""
+    while offset + 12 <= end:
+        chunk_id = mm[offset : offset + 4]
+        size = struct.unpack_from(">Q", mm, offset + 4)[0]
+        yield chunk_id, offset + 12, size
+        offset += 12 + size + (size & 1)
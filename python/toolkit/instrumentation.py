@@ -0,0 +1,265 @@
+import functools
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, ParamSpec, TypeVar
+
+from toolkit.logging_config import flush_logging, get_logger
+
+logger = get_logger("toolkit")
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass
+class Measurement:
+    """Resources used while one pipeline step or external tool call ran.
+
+    CPU time and I/O come from process-wide counters, so steps that overlap in
+    time (such as pooled workers) each see the combined usage. Child peak memory
+    is the largest peak of the children reaped with wait_child on the same
+    thread during the block, and None when there were none.
+    """
+
+    kind: str
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    read_bytes: int | None
+    write_bytes: int | None
+    child_peak_rss_mib: float | None
+    succeeded: bool
+
+
+@dataclass
+class _Snapshot:
+    wall: float
+    cpu: float
+    read_bytes: int | None
+    write_bytes: int | None
+
+
+_measurements: list[Measurement] = []
+_lock = threading.Lock()
+_local = threading.local()
+
+
+@contextmanager
+def instrument(name: str, kind: str = "step", **fields: Any) -> Iterator[None]:
+    """Measure the enclosed block and log it to the JSON log as structured data."""
+    before = _snapshot()
+    succeeded = False
+    child_peaks: list[float] = []
+    _open_peaks().append(child_peaks)
+
+    try:
+        yield
+        succeeded = True
+    finally:
+        _open_peaks().remove(child_peaks)
+        after = _snapshot()
+        measurement = Measurement(
+            kind=kind,
+            name=name,
+            wall_seconds=round(after.wall - before.wall, 3),
+            cpu_seconds=round(after.cpu - before.cpu, 3),
+            read_bytes=_delta(before.read_bytes, after.read_bytes),
+            write_bytes=_delta(before.write_bytes, after.write_bytes),
+            child_peak_rss_mib=max(child_peaks, default=None),
+            succeeded=succeeded,
+        )
+
+        with _lock:
+            _measurements.append(measurement)
+
+        logger.info(
+            f"{kind} {name}: {measurement.wall_seconds}s",
+            extra={"data": asdict(measurement) | fields, "console": False},
+        )
+
+
+def instrumented(func: Callable[P, R]) -> Callable[P, R]:
+    """Decorate a pipeline step so every call is measured under its name."""
+
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        with instrument(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def wait_child(process: subprocess.Popen[Any]) -> int:
+    """Wait for process and charge its peak memory to the blocks measuring it.
+
+    Uses os.wait4 where available, so the child must not have been waited on
+    already, as Popen.communicate does.
+    """
+    if not hasattr(os, "wait4") or process.returncode is not None:
+        return process.wait()
+
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    peak = round(usage.ru_maxrss * rss_unit / (1024 * 1024), 1)
+
+    for child_peaks in _open_peaks():
+        child_peaks.append(peak)
+
+    return process.returncode
+
+
+def tool_name(cmd: list[str]) -> str:
+    """Name an external tool call after its executable."""
+    return Path(cmd[0]).stem
+
+
+def print_summary() -> None:
+    """Print per-step and per-tool totals for everything measured so far."""
+    with _lock:
+        measurements = list(_measurements)
+
+    if not measurements:
+        return
+
+    from rich.console import Console  # type: ignore[import-untyped]
+    from rich.table import Table  # type: ignore[import-untyped]
+
+    groups: dict[tuple[str, str], list[Measurement]] = {}
+
+    for m in measurements:
+        groups.setdefault((m.kind, m.name), []).append(m)
+
+    flush_logging()
+    table = Table(title="Where the time went")
+
+    for column in [
+        "Kind",
+        "Name",
+        "Calls",
+        "Failed",
+        "Wall (s)",
+        "CPU (s)",
+        "Read (MiB)",
+        "Written (MiB)",
+        "Child peak (MiB)",
+    ]:
+        table.add_column(column)
+
+    for (kind, name), group in sorted(
+        groups.items(), key=lambda g: -sum(m.wall_seconds for m in g[1])
+    ):
+        peaks = [m.child_peak_rss_mib for m in group if m.child_peak_rss_mib]
+        table.add_row(
+            kind,
+            name,
+            str(len(group)),
+            str(sum(not m.succeeded for m in group)),
+            f"{sum(m.wall_seconds for m in group):.2f}",
+            f"{sum(m.cpu_seconds for m in group):.2f}",
+            _mib(sum(m.read_bytes or 0 for m in group)),
+            _mib(sum(m.write_bytes or 0 for m in group)),
+            f"{max(peaks):.1f}" if peaks else "-",
+        )
+
+    Console().print(table)
+
+
+def profile_startup(args: list[str], top: int = 25) -> int:
+    """Run the CLI under -X importtime and print its slowest imports.
+
+    Returns the command's exit code. Its own stderr is passed through.
+    """
+    from rich.console import Console  # type: ignore[import-untyped]
+    from rich.table import Table  # type: ignore[import-untyped]
+
+    package_root = str(Path(__file__).resolve().parent.parent)
+    python_path = os.pathsep.join(filter(None, [package_root, os.getenv("PYTHONPATH")]))
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "toolkit.cli", *args],
+        stderr=subprocess.PIPE,
+        text=True,
+        env=os.environ | {"PYTHONPATH": python_path},
+    )
+    elapsed = time.perf_counter() - started
+    imports: list[tuple[str, int, int]] = []
+
+    for line in process.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+
+        if not line.startswith("import time:") or len(fields) != 3:
+            sys.stderr.write(line + "\n")
+            continue
+
+        try:
+            imports.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+        except ValueError:
+            continue
+
+    total_ms = sum(self_us for _, self_us, _ in imports) / 1000
+    table = Table(
+        title=f"Startup imports: {total_ms:.0f} ms of {elapsed * 1000:.0f} ms total"
+    )
+
+    for column in ["Module", "Self (ms)", "Cumulative (ms)"]:
+        table.add_column(column)
+
+    for name, self_us, cumulative_us in sorted(imports, key=lambda i: -i[1])[:top]:
+        table.add_row(name, f"{self_us / 1000:.1f}", f"{cumulative_us / 1000:.1f}")
+
+    Console(stderr=True).print(table)
+
+    return process.returncode
+
+
+def _open_peaks() -> list[list[float]]:
+    """Child peak lists of the blocks currently being measured on this thread."""
+    if not hasattr(_local, "open_peaks"):
+        _local.open_peaks = []
+
+    return _local.open_peaks
+
+
+def _snapshot() -> _Snapshot:
+    read_bytes = write_bytes = None
+    child_cpu = 0.0
+
+    try:
+        import resource
+
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        child_cpu = usage.ru_utime + usage.ru_stime
+    except ImportError:
+        pass
+
+    try:
+        counters = dict(
+            line.split(": ") for line in Path("/proc/self/io").read_text().splitlines()
+        )
+        read_bytes = int(counters["read_bytes"])
+        write_bytes = int(counters["write_bytes"])
+    except (OSError, KeyError, ValueError):
+        pass
+
+    return _Snapshot(
+        wall=time.perf_counter(),
+        cpu=time.process_time() + child_cpu,
+        read_bytes=read_bytes,
+        write_bytes=write_bytes,
+    )
+
+
+def _delta(before: int | None, after: int | None) -> int | None:
+    return after - before if before is not None and after is not None else None
+
+
+def _mib(value: int) -> str:
+    return f"{value / (1024 * 1024):.1f}"
@@ -0,0 +1,518 @@
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from toolkit.logging_config import get_logger
+
+logger = get_logger("jobs")
+
+
+JOBS_DIR = Path.home() / ".toolkit" / "jobs"
+JOBS_DB_PATH = JOBS_DIR / "jobs.sqlite3"
+DEFAULT_LIMITS = {"disc": 1, "cpu": 1}
+COMMAND_RESOURCES = {("video", "remux"): "disc"}
+RUNNER_TIMEOUT_SECONDS = 15.0
+POLL_SECONDS = 2.0
+
+
+@dataclass
+class Job:
+    """A queued CLI invocation and where it has got to."""
+
+    id: int
+    args: list[str]
+    cwd: str
+    resource: str
+    status: str
+    submitted: float
+    started: float | None
+    finished: float | None
+    exit_code: int | None
+    pid: int | None
+    checkpoints: int
+
+
+def submit_job(args: list[str], cwd: Path, resource: str | None = None) -> int:
+    """Queue a CLI invocation and return its job ID.
+
+    The resource decides which concurrency limit the job counts against and
+    defaults to "disc" for disc remuxes and "cpu" for everything else.
+    """
+    if not resource and len(args) >= 2:
+        resource = COMMAND_RESOURCES.get((args[0], args[1]))
+
+    resource = resource or "cpu"
+
+    with _database() as db:
+        cursor = db.execute(
+            "INSERT INTO jobs (args, cwd, resource, status, submitted) "
+            "VALUES (?, ?, ?, 'queued', ?)",
+            ("\0".join(args), str(cwd), resource, time.time()),
+        )
+
+    assert cursor.lastrowid is not None
+    return cursor.lastrowid
+
+
+def list_jobs() -> list[Job]:
+    """Return every job, oldest first, with its number of completed checkpoints."""
+    with _database() as db:
+        rows = db.execute(
+            "SELECT jobs.*, COUNT(checkpoints.item) FROM jobs "
+            "LEFT JOIN checkpoints ON checkpoints.job_id = jobs.id "
+            "GROUP BY jobs.id ORDER BY jobs.id"
+        ).fetchall()
+
+    return [_job(row) for row in rows]
+
+
+def cancel_job(job_id: int) -> str:
+    """Cancel a queued job, or ask the runner to stop a running one."""
+    with _database() as db:
+        status = _status(db, job_id)
+
+        if status == "running":
+            status = "cancelling"
+        elif status in ("queued", "failed"):
+            status = "cancelled"
+        else:
+            raise ValueError(f"Job {job_id} is {status} and cannot be cancelled")
+
+        db.execute("UPDATE jobs SET status = ? WHERE id = ?", (status, job_id))
+
+    return status
+
+
+def resume_job(job_id: int) -> None:
+    """Queue a failed or cancelled job again, keeping its checkpoints."""
+    with _database() as db:
+        status = _status(db, job_id)
+
+        if status not in ("failed", "cancelled"):
+            raise ValueError(f"Job {job_id} is {status} and cannot be resumed")
+
+        db.execute(
+            "UPDATE jobs SET status = 'queued', exit_code = NULL WHERE id = ?",
+            (job_id,),
+        )
+
+
+def run_jobs(limits: dict[str, int] | None = None, once: bool = False) -> None:
+    """Start queued jobs as resource limits allow until interrupted.
+
+    Jobs left by a runner that died are watched until their processes exit,
+    then queued again to resume from their checkpoints. With once, the runner
+    exits when the queue is empty.
+    """
+    limits = DEFAULT_LIMITS | (limits or {})
+    running: dict[int, tuple[Job, subprocess.Popen[bytes]]] = {}
+
+    with _database() as db:
+        _claim_runner(db)
+        orphans = {
+            job.id: job
+            for job in map(
+                _job,
+                db.execute(
+                    "SELECT *, 0 FROM jobs WHERE status IN ('running', 'cancelling')"
+                ).fetchall(),
+            )
+        }
+        _reap_orphans(db, orphans)
+
+    if orphans:
+        logger.info(f"Waiting on {len(orphans)} job(s) still run by an earlier runner")
+
+    logger.info(f"Job runner started with limits {limits}")
+
+    try:
+        while True:
+            with _database() as db:
+                _claim_runner(db)
+                _reap(db, running)
+                _reap_orphans(db, orphans)
+                _cancel(db, running, orphans)
+                _start(db, running, orphans, limits)
+                queued = db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+                ).fetchone()[0]
+
+            if once and not running and not orphans and not queued:
+                break
+
+            time.sleep(POLL_SECONDS)
+    except KeyboardInterrupt:
+        logger.warning("Runner interrupted, stopping running jobs")
+
+        for job, _ in running.values():
+            _terminate(job.pid)
+        for _, process in running.values():
+            process.wait()
+
+        with _database() as db:
+            db.executemany(
+                "UPDATE jobs SET status = 'queued' WHERE id = ?",
+                [(job_id,) for job_id in running],
+            )
+    finally:
+        with _database() as db:
+            db.execute("DELETE FROM runner WHERE pid = ?", (os.getpid(),))
+
+
+def start_runner(limits: dict[str, int] | None = None) -> int | None:
+    """Start a detached runner unless one is active, returning its pid."""
+    if runner_pid() is not None:
+        return None
+
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    args = ["jobs", "run"] + [f"--limit={k}={v}" for k, v in (limits or {}).items()]
+    flags: dict[str, Any] = (
+        {"creationflags": subprocess.DETACHED_PROCESS}
+        if sys.platform == "win32"
+        else {"start_new_session": True}
+    )
+
+    with open(JOBS_DIR / "runner.log", "ab") as log:
+        process = subprocess.Popen(
+            _toolkit_command(args),
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env=_toolkit_environment(),
+            **flags,
+        )
+
+    return process.pid
+
+
+def runner_pid() -> int | None:
+    """Return the pid of the active runner, judged by its heartbeat."""
+    with _database() as db:
+        row = db.execute("SELECT pid, heartbeat FROM runner").fetchone()
+
+    if row and time.time() - row[1] < RUNNER_TIMEOUT_SECONDS:
+        return row[0]
+
+    return None
+
+
+def completed(stage: str, item: str) -> str | None:
+    """Return the detail recorded when item finished stage in the current job.
+
+    Returns None when the item has not finished or no job is running, so code
+    outside the queue always does the work.
+    """
+    if not (job_id := os.getenv("TOOLKIT_JOB_ID")):
+        return None
+
+    with _database() as db:
+        row = db.execute(
+            "SELECT detail FROM checkpoints WHERE job_id = ? AND stage = ? AND item = ?",
+            (int(job_id), stage, item),
+        ).fetchone()
+
+    return row[0] if row else None
+
+
+def complete(stage: str, item: str, detail: str = "") -> None:
+    """Checkpoint item as finished with stage, if running as a queued job."""
+    if not (job_id := os.getenv("TOOLKIT_JOB_ID")):
+        return
+
+    with _database() as db:
+        db.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?)",
+            (int(job_id), stage, item, detail, time.time()),
+        )
+
+
+def _reap(
+    db: sqlite3.Connection, running: dict[int, tuple[Job, subprocess.Popen[bytes]]]
+) -> None:
+    for job_id, (job, process) in list(running.items()):
+        if (code := process.poll()) is None:
+            continue
+
+        if _status(db, job_id) == "cancelling":
+            status = "cancelled"
+        else:
+            status = "done" if code == 0 else "failed"
+
+        db.execute(
+            "UPDATE jobs SET status = ?, finished = ?, exit_code = ? WHERE id = ?",
+            (status, time.time(), code, job_id),
+        )
+        del running[job_id]
+        logger.info(f"Job {job_id} {status}: {' '.join(job.args)}")
+
+
+def _reap_orphans(db: sqlite3.Connection, orphans: dict[int, Job]) -> None:
+    """Settle jobs of an earlier runner once nothing in their process group runs.
+
+    A job that recorded its own exit code is done or failed. One that was
+    killed first is queued again to resume from its checkpoints, unless it
+    was being cancelled.
+    """
+    for job_id, job in list(orphans.items()):
+        if job.pid is not None and _alive(job.pid):
+            continue
+
+        status, code = db.execute(
+            "SELECT status, exit_code FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+
+        if status == "cancelling":
+            status = "cancelled"
+        elif code is None:
+            status = "queued"
+        else:
+            status = "done" if code == 0 else "failed"
+
+        db.execute(
+            "UPDATE jobs SET status = ?, finished = ? WHERE id = ?",
+            (status, time.time() if code is not None else None, job_id),
+        )
+        del orphans[job_id]
+        logger.info(f"Job {job_id} from an earlier runner ended, now {status}")
+
+
+def _cancel(
+    db: sqlite3.Connection,
+    running: dict[int, tuple[Job, subprocess.Popen[bytes]]],
+    orphans: dict[int, Job],
+) -> None:
+    for (job_id,) in db.execute("SELECT id FROM jobs WHERE status = 'cancelling'"):
+        if job_id in running:
+            _terminate(running[job_id][0].pid)
+        elif job_id in orphans:
+            _terminate(orphans[job_id].pid)
+
+
+def _start(
+    db: sqlite3.Connection,
+    running: dict[int, tuple[Job, subprocess.Popen[bytes]]],
+    orphans: dict[int, Job],
+    limits: dict[str, int],
+) -> None:
+    rows = db.execute(
+        "SELECT *, 0 FROM jobs WHERE status = 'queued' ORDER BY id"
+    ).fetchall()
+
+    for job in map(_job, rows):
+        active = [j for j, _ in running.values()] + list(orphans.values())
+        in_use = sum(j.resource == job.resource for j in active)
+
+        if in_use >= limits.get(job.resource, 1):
+            continue
+
+        JOBS_DIR.mkdir(parents=True, exist_ok=True)
+
+        with open(JOBS_DIR / f"{job.id}.log", "ab") as log:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "toolkit.jobs", *job.args],
+                cwd=job.cwd,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                env=_toolkit_environment() | {"TOOLKIT_JOB_ID": str(job.id)},
+                # Lead a new group, so the job stops with everything it spawned
+                creationflags=getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0),
+                start_new_session=sys.platform != "win32",
+            )
+
+        db.execute(
+            "UPDATE jobs SET status = 'running', started = ?, exit_code = NULL, "
+            "pid = ? WHERE id = ?",
+            (time.time(), process.pid, job.id),
+        )
+        job.pid = process.pid
+        running[job.id] = (job, process)
+        logger.info(f"Job {job.id} started on {job.resource}: {' '.join(job.args)}")
+
+
+def _terminate(pid: int | None) -> None:
+    """Stop a job together with the encoders and other tools it started."""
+    if pid is None:
+        return
+
+    if sys.platform == "win32":
+        subprocess.run(
+            ["taskkill", "/T", "/F", "/PID", str(pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return
+
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def _alive(pid: int) -> bool:
+    """Check whether the process group a job leads has any process left."""
+    if sys.platform == "win32":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION; exit code 259 is STILL_ACTIVE
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+
+        if not handle:
+            return False
+
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259
+
+    try:
+        os.killpg(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def _claim_runner(db: sqlite3.Connection) -> None:
+    """Take or refresh the single runner slot, failing if another runner holds it."""
+    row = db.execute("SELECT pid, heartbeat FROM runner").fetchone()
+
+    if (
+        row
+        and row[0] != os.getpid()
+        and time.time() - row[1] < RUNNER_TIMEOUT_SECONDS
+    ):
+        raise RuntimeError(f"Another job runner is active (pid {row[0]})")
+
+    db.execute("DELETE FROM runner")
+    db.execute("INSERT INTO runner VALUES (?, ?)", (os.getpid(), time.time()))
+
+
+def _status(db: sqlite3.Connection, job_id: int) -> str:
+    row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    if not row:
+        raise ValueError(f"No job with ID {job_id}")
+
+    return row[0]
+
+
+def _job(row: tuple[Any, ...]) -> Job:
+    job_id, args, cwd, resource, status, submitted, started, finished = row[:8]
+    code, pid, count = row[8:]
+    return Job(
+        job_id,
+        args.split("\0"),
+        cwd,
+        resource,
+        status,
+        submitted,
+        started,
+        finished,
+        code,
+        pid,
+        count,
+    )
+
+
+def _toolkit_command(args: list[str]) -> list[str]:
+    return [sys.executable, "-m", "toolkit.cli", *args]
+
+
+def _toolkit_environment() -> dict[str, str]:
+    """Environment for child toolkit processes, run in-process and importable."""
+    package_root = str(Path(__file__).resolve().parent.parent)
+    python_path = os.pathsep.join(filter(None, [package_root, os.getenv("PYTHONPATH")]))
+
+    return os.environ | {"PYTHONPATH": python_path, "TOOLKIT_NO_DAEMON": "1"}
+
+
+@contextmanager
+def _database() -> Iterator[sqlite3.Connection]:
+    """Open the queue database for one transaction.
+
+    A fresh connection per transaction keeps the runner, its jobs and CLI
+    calls in separate processes safe to use together.
+    """
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(JOBS_DB_PATH, timeout=30)
+
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                args TEXT NOT NULL,
+                cwd TEXT NOT NULL,
+                resource TEXT NOT NULL,
+                status TEXT NOT NULL,
+                submitted REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                exit_code INTEGER,
+                pid INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                job_id INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                item TEXT NOT NULL,
+                detail TEXT NOT NULL,
+                completed REAL NOT NULL,
+                PRIMARY KEY (job_id, stage, item)
+            );
+            CREATE TABLE IF NOT EXISTS runner (
+                pid INTEGER NOT NULL,
+                heartbeat REAL NOT NULL
+            );
+            """
+        )
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(jobs)")]
+
+        if "pid" not in columns:
+            connection.execute("ALTER TABLE jobs ADD COLUMN pid INTEGER")
+
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    """Run a queued CLI invocation and record its exit code for later runners.
+
+    A runner that died cannot reap its jobs, so the one that takes over reads
+    the code from the queue instead of running a finished job again.
+    """
+    code = 1
+
+    try:
+        from toolkit.cli import main as cli_main
+
+        sys.argv = ["toolkit", *sys.argv[1:]]
+        cli_main()
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        raise
+    finally:
+        if job_id := os.getenv("TOOLKIT_JOB_ID"):
+            with _database() as db:
+                db.execute(
+                    "UPDATE jobs SET exit_code = ? WHERE id = ?", (code, int(job_id))
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,87 @@
 import atexit
+import copy
+import gzip
 import json
 import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
 import uuid
-from datetime import datetime, timezone
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, cast
+from typing import IO, Any, cast
 
-from rich.console import Console  # type: ignore[import-untyped]
-from rich.logging import RichHandler  # type: ignore[import-untyped]
+
+LOG_DIR = Path.home() / ".toolkit" / "logs"
+LOG_MAX_BYTES = 16 * 1024 * 1024
+LOG_MAX_AGE = timedelta(days=7)
+LOG_BACKUP_COUNT = 20
+LOG_FLUSH_RECORDS = 64
+LOG_FLUSH_SECONDS = 1.0
+LOG_QUEUE_SIZE = 10_000
+LOG_BLOCK_SECONDS = 1.0
+
+_log_queue: queue.Queue[logging.LogRecord] | None = None
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: "BoundedQueueHandler | None" = None
+_setup_lock = threading.Lock()
+
+
+@dataclass
+class Session:
+    """One run of a service, reconstructed from its log entries."""
+
+    session_id: str
+    started_at: str | None
+    ended_at: str | None
+    status: str
+    entries: int
 
 
 class JsonFileHandler(logging.Handler):
-    """Custom logging handler that writes structured JSON logs with session tracking."""
+    """Custom logging handler that appends JSON Lines logs with session tracking.
+
+    Records are buffered and flushed every LOG_FLUSH_RECORDS records, after
+    LOG_FLUSH_SECONDS, on warnings and on close. The active file is rotated
+    into a gzip-compressed segment once it exceeds LOG_MAX_BYTES or
+    LOG_MAX_AGE. Several processes may append to it at once, so each session
+    holds its own lock and a stream is reopened once another process rotates
+    the file away from it.
+    """
 
     log_path: Path
     lock_path: Path
     session_id: str
     started_at: str
     session_closed: bool
+    stream: IO[str] | None
+    segment_started: datetime
+    pending: int
+    last_flush: float
 
     def __init__(self, service_name: str) -> None:
         super().__init__()
-        self.log_path = Path.home() / ".toolkit" / "logs" / f"{service_name}.json"
-        self.lock_path = self.log_path.with_suffix(".lock")
+        self.log_path = LOG_DIR / f"{service_name}.jsonl"
         self.session_id = str(uuid.uuid4())
+        self.lock_path = self.log_path.with_name(
+            f"{self.log_path.stem}.{self.session_id}.lock"
+        )
         self.started_at = datetime.now(timezone.utc).isoformat()
         self.session_closed = False
+        self.stream = None
+        self.pending = 0
+        self.last_flush = time.monotonic()
 
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
-        self._handle_stale_lock()
+        migrate_legacy_log(service_name)
+        self.segment_started = _segment_started(self.log_path)
+        self._handle_stale_locks()
         self._write_lock()
 
         self._append_entry(
@@ -58,86 +111,469 @@ class JsonFileHandler(logging.Handler):
         if hasattr(record, "data"):
             log_entry["data"] = getattr(record, "data")
 
-        self._append_entry(log_entry)
+        try:
+            self._append_entry(log_entry, flush=record.levelno >= logging.WARNING)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self.stream:
+                self.stream.flush()
+            self.pending = 0
+            self.last_flush = time.monotonic()
+        finally:
+            self.release()
 
     def close(self) -> None:
-        if not self.session_closed:
+        self.acquire()
+        try:
+            if not self.session_closed:
+                self._append_entry(
+                    {
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "type": "session_end",
+                        "session_id": self.session_id,
+                    },
+                    flush=True,
+                )
+                self._delete_lock()
+                self.session_closed = True
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+        finally:
+            self.release()
+        super().close()
+
+    def _handle_stale_locks(self) -> None:
+        """Mark sessions whose process exited without closing them as crashed.
+
+        A lock whose process is still alive belongs to a session running
+        elsewhere. Only the process that removes a stale lock reports it.
+        """
+        for lock_path in _session_locks(self.log_path):
+            fields = _read_lock(lock_path)
+
+            if fields is None or _lock_alive(fields):
+                continue
+
+            try:
+                lock_path.unlink()
+            except FileNotFoundError:
+                continue
+
             self._append_entry(
                 {
                     "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "type": "session_end",
-                    "session_id": self.session_id,
+                    "type": "session_crash",
+                    "session_id": fields[0],
+                    "started_at": fields[1],
                 }
             )
-            self._delete_lock()
-            self.session_closed = True
-        super().close()
-
-    def _handle_stale_lock(self) -> None:
-        if not self.lock_path.exists():
-            return
-
-        lock_content = self.lock_path.read_text(encoding="utf-8")
-        stale_session_id, stale_started_at = lock_content.split("|")
-
-        self._append_entry(
-            {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "type": "session_crash",
-                "session_id": stale_session_id,
-                "started_at": stale_started_at,
-            }
-        )
-        self._delete_lock()
 
     def _write_lock(self) -> None:
-        self.lock_path.write_text(
-            f"{self.session_id}|{self.started_at}", encoding="utf-8"
+        # Written aside and renamed, so other processes never read half a lock
+        partial = self.lock_path.with_suffix(".partial")
+        partial.write_text(
+            f"{self.session_id}|{self.started_at}|{os.getpid()}", encoding="utf-8"
         )
+        partial.replace(self.lock_path)
 
     def _delete_lock(self) -> None:
         if self.lock_path.exists():
             self.lock_path.unlink()
 
-    def _append_entry(self, entry: dict[str, Any]) -> None:
-        entries = self._load_entries()
-        entries.append(entry)
-        self.log_path.write_text(
-            json.dumps(entries, indent=2, ensure_ascii=False), encoding="utf-8"
+    def _append_entry(self, entry: dict[str, Any], flush: bool = False) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        if self.stream is not None and self._rotated_away():
+            # Closing flushes the buffer into the segment being compressed
+            self.stream.close()
+            self.stream = None
+            self.segment_started = _segment_started(self.log_path)
+
+        if self.stream is None:
+            self.stream = open(self.log_path, "a", encoding="utf-8")
+        elif self._should_rotate():
+            self._rotate()
+
+        assert self.stream is not None
+        self.stream.write(line)
+        self.pending += 1
+
+        if (
+            flush
+            or self.pending >= LOG_FLUSH_RECORDS
+            or time.monotonic() - self.last_flush >= LOG_FLUSH_SECONDS
+        ):
+            self.flush()
+
+    def _rotated_away(self) -> bool:
+        """Check whether another process rotated the active file since it was opened."""
+        assert self.stream is not None
+        try:
+            current = os.stat(self.log_path)
+        except FileNotFoundError:
+            return True
+
+        opened = os.fstat(self.stream.fileno())
+        return (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev)
+
+    def _should_rotate(self) -> bool:
+        assert self.stream is not None
+        return (
+            self.stream.tell() >= LOG_MAX_BYTES
+            or datetime.now(timezone.utc) - self.segment_started >= LOG_MAX_AGE
         )
 
-    def _load_entries(self) -> list[dict[str, Any]]:
-        if not self.log_path.exists():
-            return []
-        content = self.log_path.read_text(encoding="utf-8").strip()
-        if not content:
-            return []
-        data = json.loads(content)
-        if isinstance(data, list):
-            return cast(list[dict[str, Any]], data)
-        return []
+    def _rotate(self) -> None:
+        assert self.stream is not None
+        self.stream.close()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        # Move the file aside first, so writers that have not noticed yet still
+        # land in it rather than in the next segment's file
+        staging = self.log_path.with_name(f"{self.log_path.stem}.{stamp}.rotating")
+
+        try:
+            self.log_path.rename(staging)
+        except FileNotFoundError:
+            pass
+        else:
+            _compress_segment(staging, self.log_path, stamp)
+            _prune_segments(self.log_path)
+        self.stream = open(self.log_path, "a", encoding="utf-8")
+        self.segment_started = datetime.now(timezone.utc)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue records for a listener thread without letting a full queue stall callers.
+
+    When the queue is full, info and debug records are dropped and counted,
+    while warnings and errors wait up to LOG_BLOCK_SECONDS for room. The
+    number dropped is logged as a warning once the queue drains.
+    """
+
+    log_queue: queue.Queue[logging.LogRecord]
+    dropped: int
 
+    def __init__(self, log_queue: queue.Queue[logging.LogRecord]) -> None:
+        super().__init__(log_queue)
+        self.log_queue = log_queue
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep exc_info so RichHandler can still render the traceback
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.dropped:
+            try:
+                self.log_queue.put_nowait(
+                    logging.makeLogRecord(
+                        {
+                            "name": record.name,
+                            "levelno": logging.WARNING,
+                            "levelname": "WARNING",
+                            "msg": f"Dropped {self.dropped} log records "
+                            "while the log queue was full",
+                        }
+                    )
+                )
+                self.dropped = 0
+            except queue.Full:
+                pass
+
+        try:
+            if record.levelno >= logging.WARNING:
+                self.log_queue.put(record, timeout=LOG_BLOCK_SECONDS)
+            else:
+                self.log_queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def flush_logging() -> None:
+    """Wait for queued records to be handled and flush every handler."""
+    if _listener is not None and _log_queue is not None:
+        _log_queue.join()
+        handlers = _listener.handlers
+    else:
+        handlers = tuple(logging.getLogger("toolkit").handlers)
+
+    for handler in handlers:
+        handler.flush()
+
+
+def start_child_session(service_name: str = "toolkit") -> None:
+    """Give a forked child its own log session rather than its parent's.
+
+    The inherited handlers are dropped without ending the parent's session or
+    removing its lock, and new ones are built on the child's first record.
+    """
+    global _log_queue, _listener, _queue_handler
 
-def configure_logging(service_name: str = "toolkit") -> logging.Logger:
-    """Configure and return a logger with console and JSON file handlers."""
     logger = logging.getLogger("toolkit")
-    logger.setLevel(logging.INFO)
+    inherited = _listener.handlers if _listener is not None else logger.handlers
 
-    if not logger.handlers:
-        console = Console()
-        console_handler = RichHandler(
-            console=console,
-            show_time=True,
-            show_path=False,
-            rich_tracebacks=True,
-            markup=True,
+    _stop_listener()
+    _log_queue = _queue_handler = None
+
+    for handler in inherited:
+        if isinstance(handler, JsonFileHandler):
+            handler.session_closed = True
+            handler.close()
+
+    logger.handlers = []
+    configure_logging(service_name)
+
+
+def shutdown_logging() -> None:
+    """Drain and close the handlers, ending the session, for exits that skip atexit."""
+    logger = logging.getLogger("toolkit")
+    handlers = _listener.handlers if _listener is not None else logger.handlers
+
+    _stop_listener()
+
+    for handler in handlers:
+        handler.close()
+
+
+def _stop_listener() -> None:
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_in_child() -> None:
+    """Give a forked child its own queue and listener.
+
+    The parent's listener thread does not survive fork but stays registered as
+    a waiter on the inherited queue, so the child needs a fresh one.
+    """
+    global _log_queue, _listener
+
+    if _listener is not None and _queue_handler is not None:
+        _log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        _queue_handler.queue = _queue_handler.log_queue = _log_queue
+        _listener = logging.handlers.QueueListener(
+            _log_queue, *_listener.handlers, respect_handler_level=True
+        )
+        _listener.start()
+
+
+def log_segments(service_name: str = "toolkit") -> list[Path]:
+    """Return a service's log files, oldest segment first and the active file last."""
+    log_path = LOG_DIR / f"{service_name}.jsonl"
+    segments = sorted(LOG_DIR.glob(f"{service_name}.*.jsonl.gz"))
+
+    return segments + [log_path] if log_path.exists() else segments
+
+
+def read_entries(service_name: str = "toolkit") -> Iterator[dict[str, Any]]:
+    """Stream every log entry of a service in write order, skipping torn lines.
+
+    A legacy JSON-array log is converted first, since readers may run before
+    anything in this process has logged.
+    """
+    migrate_legacy_log(service_name)
+
+    for segment in log_segments(service_name):
+        opener = gzip.open if segment.suffix == ".gz" else open
+
+        with opener(segment, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def read_sessions(service_name: str = "toolkit") -> list[Session]:
+    """Summarize each session as completed, crashed or running, oldest first.
+
+    A session is running while its process still holds its lock, and
+    crashed if a later run found its stale lock; anything else without an end
+    entry was cut off before it could be marked.
+    """
+    sessions: dict[str, Session] = {}
+
+    for entry in read_entries(service_name):
+        session_id = entry.get("session_id")
+        if not session_id:
+            continue
+
+        session = sessions.setdefault(
+            session_id, Session(session_id, None, None, "interrupted", 0)
         )
-        console_handler.setLevel(logging.INFO)
-        logger.addHandler(console_handler)
+        entry_type = entry.get("type")
+
+        if entry_type == "session_start":
+            session.started_at = entry["timestamp"]
+        elif entry_type == "session_end":
+            session.ended_at = entry["timestamp"]
+            session.status = "completed"
+        elif entry_type == "session_crash":
+            session.started_at = session.started_at or entry.get("started_at")
+            session.ended_at = entry["timestamp"]
+            session.status = "crashed"
+        else:
+            session.entries += 1
+
+    for lock_path in _session_locks(LOG_DIR / f"{service_name}.jsonl"):
+        fields = _read_lock(lock_path)
+
+        if fields is None or not _lock_alive(fields):
+            continue
+
+        session = sessions.get(fields[0])
+        if session and session.status == "interrupted":
+            session.status = "running"
+
+    return list(sessions.values())
+
+
+def _session_locks(log_path: Path) -> list[Path]:
+    """Return each open session's lock, including a legacy shared one."""
+    locks = sorted(log_path.parent.glob(f"{log_path.stem}.*.lock"))
+    legacy = log_path.with_suffix(".lock")
+
+    return locks + [legacy] if legacy.exists() else locks
+
+
+def _read_lock(lock_path: Path) -> list[str] | None:
+    """Return a lock's session ID, start time and pid, or None once it is gone."""
+    try:
+        return lock_path.read_text(encoding="utf-8").split("|")
+    except FileNotFoundError:
+        return None
+
+
+def _lock_alive(fields: list[str]) -> bool:
+    # Locks from before pids were recorded cannot be checked and count as stale
+    return len(fields) > 2 and _process_alive(int(fields[2]))
+
+
+def _process_alive(pid: int) -> bool:
+    if sys.platform == "win32":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION; exit code 259 is STILL_ACTIVE
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+
+        if not handle:
+            return False
+
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def migrate_legacy_log(service_name: str = "toolkit") -> None:
+    """Convert a JSON-array log from before JSON Lines into a compressed segment."""
+    legacy_path = LOG_DIR / f"{service_name}.json"
+
+    if not legacy_path.exists():
+        return
+
+    content = legacy_path.read_text(encoding="utf-8").strip()
+    data = json.loads(content) if content else []
+    entries = cast(list[dict[str, Any]], data) if isinstance(data, list) else []
+    staging = legacy_path.with_suffix(".migrating.jsonl")
+
+    with open(staging, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    _compress_segment(staging, LOG_DIR / f"{service_name}.jsonl", "00000000T000000")
+    legacy_path.unlink()
+
+
+def _compress_segment(source: Path, log_path: Path, stamp: str | None = None) -> None:
+    """Gzip source into a timestamped segment beside log_path and remove it."""
+    stamp = stamp or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    segment = log_path.with_name(f"{log_path.stem}.{stamp}.jsonl.gz")
+    partial = segment.with_name(f"{segment.name}.partial")
+
+    with open(source, "rb") as f, gzip.open(partial, "wb") as out:
+        shutil.copyfileobj(f, out)
+
+    partial.replace(segment)
+    source.unlink()
+
+
+def _prune_segments(log_path: Path) -> None:
+    segments = sorted(log_path.parent.glob(f"{log_path.stem}.*.jsonl.gz"))
 
-        json_handler = JsonFileHandler(service_name)
-        json_handler.setLevel(logging.INFO)
-        logger.addHandler(json_handler)
+    for segment in segments[:-LOG_BACKUP_COUNT]:
+        segment.unlink()
+
+
+def _segment_started(log_path: Path) -> datetime:
+    """Return when the active log file was started, from its first entry."""
+    try:
+        with open(log_path, encoding="utf-8") as f:
+            return datetime.fromisoformat(json.loads(f.readline())["timestamp"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return datetime.now(timezone.utc)
+
+
+class DeferredHandler(logging.Handler):
+    """Placeholder that builds the real handlers when the first record arrives.
+
+    Commands that never log, such as --help and shell completion, then skip
+    importing Rich and opening the JSON log.
+    """
+
+    service_name: str
+    asynchronous: bool
+
+    def __init__(self, service_name: str, asynchronous: bool) -> None:
+        super().__init__()
+        self.service_name = service_name
+        self.asynchronous = asynchronous
+
+    def emit(self, record: logging.LogRecord) -> None:
+        for handler in _install_handlers(self):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def configure_logging(
+    service_name: str = "toolkit", asynchronous: bool | None = None
+) -> logging.Logger:
+    """Configure and return a logger with console and JSON file handlers.
+
+    Handlers are built on the first record and run on a background listener
+    thread unless asynchronous is False or TOOLKIT_SYNC_LOGGING is set, in
+    which case they run on the caller.
+    """
+    if asynchronous is None:
+        asynchronous = not os.getenv("TOOLKIT_SYNC_LOGGING")
+
+    logger = logging.getLogger("toolkit")
+    logger.setLevel(logging.INFO)
+
+    if not logger.handlers:
+        logger.addHandler(DeferredHandler(service_name, asynchronous))
 
     return logger
 
@@ -145,3 +581,61 @@ def configure_logging(service_name: str = "toolkit") -> logging.Logger:
 def get_logger(service_name: str = "toolkit") -> logging.Logger:
     """Get or create a configured logger for the specified service."""
     return configure_logging(service_name)
+
+
+def _install_handlers(placeholder: DeferredHandler) -> list[logging.Handler]:
+    """Replace the placeholder with the real handlers once, returning them."""
+    logger = logging.getLogger("toolkit")
+
+    with _setup_lock:
+        if placeholder in logger.handlers:
+            # Assign a new list, since Logger.callHandlers may be iterating the old one
+            logger.handlers = _build_handlers(
+                placeholder.service_name, placeholder.asynchronous
+            )
+
+        return list(logger.handlers)
+
+
+def _build_handlers(service_name: str, asynchronous: bool) -> list[logging.Handler]:
+    global _log_queue, _listener, _queue_handler
+
+    from rich.console import Console  # type: ignore[import-untyped]
+    from rich.logging import RichHandler  # type: ignore[import-untyped]
+
+    console = Console()
+    console_handler = RichHandler(
+        console=console,
+        show_time=True,
+        show_path=False,
+        rich_tracebacks=True,
+        markup=True,
+    )
+    console_handler.setLevel(logging.INFO)
+    console_handler.addFilter(lambda record: getattr(record, "console", True))
+
+    json_handler = JsonFileHandler(service_name)
+    json_handler.setLevel(logging.INFO)
+
+    if not asynchronous:
+        # Flush before fork, or a child writes the parent's buffer a second time
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(before=flush_logging)
+        return [console_handler, json_handler]
+
+    _log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(
+        _log_queue, console_handler, json_handler, respect_handler_level=True
+    )
+    _listener.start()
+    _queue_handler = BoundedQueueHandler(_log_queue)
+
+    # Registered after JsonFileHandler, so the queue drains before it closes
+    atexit.register(_stop_listener)
+
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(
+            before=flush_logging, after_in_child=_restart_listener_in_child
+        )
+
+    return [_queue_handler]
@@ -0,0 +1,192 @@
+import json
+import math
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from rich.console import Console  # type: ignore[import-untyped]
+from rich.table import Table  # type: ignore[import-untyped]
+
+from toolkit.logging_config import read_entries, read_sessions
+
+
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+METRICS = ["wall_seconds", "cpu_seconds", "realtime_factor"]
+
+
+@dataclass
+class StageStats:
+    """Percentiles of one timing metric for one stage across every matching run."""
+
+    stage: str
+    group: str
+    metric: str
+    count: int
+    p50: float
+    p90: float
+    p99: float
+    maximum: float
+
+
+def query_entries(
+    service_name: str = "toolkit",
+    session: str | None = None,
+    level: str | None = None,
+    module: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Stream log entries matching every given filter, oldest first.
+
+    Session matches on an ID prefix and level is a minimum. Naive times are
+    taken as local time.
+    """
+    min_level = LEVELS.index(level.upper()) if level else 0
+    since = since.astimezone() if since else None
+    until = until.astimezone() if until else None
+
+    for entry in read_entries(service_name):
+        if session and not entry.get("session_id", "").startswith(session):
+            continue
+        if level:
+            entry_level = entry.get("level")
+            # Unknown levels rank lowest rather than failing the whole query
+            if (LEVELS.index(entry_level) if entry_level in LEVELS else 0) < min_level:
+                continue
+        if module and entry.get("source", {}).get("module") != module:
+            continue
+        if since or until:
+            timestamp = datetime.fromisoformat(entry["timestamp"])
+            if (since and timestamp < since) or (until and timestamp > until):
+                continue
+
+        yield entry
+
+
+def stage_statistics(
+    entries: Iterable[dict[str, Any]], group_by: str | None = None
+) -> list[StageStats]:
+    """Aggregate timing data in log entries into per-stage percentiles.
+
+    group_by splits each stage by a data field, or by "day" or "month" of the
+    entry to show drift over time.
+    """
+    samples: dict[tuple[str, str, str], list[float]] = {}
+
+    for entry in entries:
+        data = entry.get("data")
+        if not isinstance(data, dict) or not (stage := _stage_name(data)):
+            continue
+
+        group = _group_value(entry, data, group_by) if group_by else ""
+
+        for metric in METRICS:
+            if isinstance(value := data.get(metric), (int, float)):
+                samples.setdefault((stage, group, metric), []).append(value)
+
+    stats: list[StageStats] = []
+
+    for (stage, group, metric), values in sorted(samples.items()):
+        values.sort()
+        stats.append(
+            StageStats(
+                stage=stage,
+                group=group,
+                metric=metric,
+                count=len(values),
+                p50=_percentile(values, 50),
+                p90=_percentile(values, 90),
+                p99=_percentile(values, 99),
+                maximum=values[-1],
+            )
+        )
+
+    return stats
+
+
+def print_entries(entries: Iterable[dict[str, Any]], raw: bool = False) -> None:
+    """Print entries one per line as they are read."""
+    console = Console()
+
+    for entry in entries:
+        if raw:
+            print(json.dumps(entry, ensure_ascii=False))
+            continue
+
+        source = entry.get("source", {})
+        console.print(
+            f"{entry['timestamp'][:19]} {entry['session_id'][:8]} "
+            f"{entry.get('level', entry['type']):<13} "
+            f"{source.get('module', '-')}: {entry.get('message', '')}",
+            markup=False,
+            highlight=False,
+        )
+
+
+def print_sessions(service_name: str = "toolkit") -> None:
+    """Print every session with its status and number of log entries."""
+    table = Table(title=f"Sessions of {service_name}")
+
+    for column in ["Session", "Started", "Ended", "Status", "Entries"]:
+        table.add_column(column)
+
+    for s in read_sessions(service_name):
+        table.add_row(
+            s.session_id[:8],
+            (s.started_at or "-")[:19],
+            (s.ended_at or "-")[:19],
+            s.status,
+            str(s.entries),
+        )
+
+    Console().print(table)
+
+
+def print_statistics(stats: list[StageStats]) -> None:
+    """Print stage percentiles as a table."""
+    table = Table(title="Stage timings")
+    grouped = any(s.group for s in stats)
+
+    for column in ["Stage", *(["Group"] if grouped else []), "Metric", "Count"]:
+        table.add_column(column)
+
+    for column in ["p50", "p90", "p99", "Max"]:
+        table.add_column(column, justify="right")
+
+    for s in stats:
+        table.add_row(
+            s.stage,
+            *([s.group] if grouped else []),
+            s.metric,
+            str(s.count),
+            *(f"{v:.2f}" for v in [s.p50, s.p90, s.p99, s.maximum]),
+        )
+
+    Console().print(table)
+
+
+def _stage_name(data: dict[str, Any]) -> str | None:
+    """Name the stage a data payload measured, or None if it carries no timing."""
+    if not any(metric in data for metric in METRICS):
+        return None
+
+    if "kind" in data and "name" in data:
+        name = f"{data['kind']}:{data['name']}"
+        return f"{name}/{data['stage']}" if "stage" in data else name
+
+    return data.get("stage")
+
+
+def _group_value(entry: dict[str, Any], data: dict[str, Any], group_by: str) -> str:
+    if group_by == "day":
+        return entry["timestamp"][:10]
+    if group_by == "month":
+        return entry["timestamp"][:7]
+
+    return str(data.get(group_by, "-"))
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from toolkit.filesystem import file_digest
+
+
+@dataclass
+class ManifestEntry:
+    """How one output file was produced and what it contained when written."""
+
+    source: str
+    source_size: int
+    source_mtime_ns: int
+    source_digest: str
+    settings: str
+    output_digest: str
+    # Unknown for entries written before outputs were stat-checked
+    output_size: int = -1
+    output_mtime_ns: int = -1
+
+
+class ConversionManifest:
+    """Record of every output produced in a destination tree, kept beside it.
+
+    Entries are indexed by output and by source. Outputs whose size and mtime
+    match the record are trusted without hashing, and recorded entries are
+    only written to disk by save.
+    """
+
+    destination: Path
+    path: Path
+    entries: dict[str, ManifestEntry]
+    _by_source: dict[str, ManifestEntry]
+    _dirty: bool
+    _lock: threading.Lock
+
+    def __init__(self, destination: Path) -> None:
+        self.destination = destination
+        self.path = destination.parent / f".{destination.name}.manifest.json"
+        self.entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.entries = {key: ManifestEntry(**value) for key, value in data.items()}
+
+        self._by_source = {e.source: e for e in self.entries.values()}
+
+    def source_digest(self, source: Path) -> str | None:
+        """Return the recorded digest of source if it is unchanged since then."""
+        stat = source.stat()
+
+        with self._lock:
+            entry = self._by_source.get(str(source))
+
+        if (
+            entry
+            and entry.source_size == stat.st_size
+            and entry.source_mtime_ns == stat.st_mtime_ns
+        ):
+            return entry.source_digest
+
+        return None
+
+    def is_current(self, output: Path, source_digest: str, settings: str) -> bool:
+        """Check output exists, is intact and came from this source and settings."""
+        with self._lock:
+            entry = self.entries.get(self._key(output))
+
+        if (
+            entry is None
+            or entry.source_digest != source_digest
+            or entry.settings != settings
+        ):
+            return False
+
+        try:
+            stat = output.stat()
+        except FileNotFoundError:
+            return False
+
+        if (stat.st_size, stat.st_mtime_ns) == (
+            entry.output_size,
+            entry.output_mtime_ns,
+        ):
+            return True
+
+        if file_digest(output) != entry.output_digest:
+            return False
+
+        # Remember the stat of an intact output, so the next check skips hashing
+        with self._lock:
+            entry.output_size, entry.output_mtime_ns = stat.st_size, stat.st_mtime_ns
+            self._dirty = True
+
+        return True
+
+    def record(
+        self, output: Path, source: Path, source_digest: str, settings: str
+    ) -> None:
+        """Record a freshly written output, to be persisted by the next save."""
+        stat = source.stat()
+        output_stat = output.stat()
+        entry = ManifestEntry(
+            source=str(source),
+            source_size=stat.st_size,
+            source_mtime_ns=stat.st_mtime_ns,
+            source_digest=source_digest,
+            settings=settings,
+            output_digest=file_digest(output),
+            output_size=output_stat.st_size,
+            output_mtime_ns=output_stat.st_mtime_ns,
+        )
+
+        with self._lock:
+            self.entries[self._key(output)] = entry
+            self._by_source[entry.source] = entry
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the manifest if anything was recorded since it was loaded or saved."""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            data = {key: asdict(value) for key, value in self.entries.items()}
+            temp = self.path.with_name(f"{self.path.name}.tmp")
+            temp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(temp, self.path)
+            self._dirty = False
+
+    def _key(self, output: Path) -> str:
+        return output.relative_to(self.destination).as_posix()
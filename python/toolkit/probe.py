@@ -0,0 +1,150 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+PROBE_CACHE_PATH = Path.home() / ".toolkit" / "cache" / "probe.sqlite3"
+PROBE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PROBE_CACHE_VERSION = 2
+PROBE_EVICT_INTERVAL = 256
+
+_connection: sqlite3.Connection | None = None
+_lock = threading.Lock()
+_unchecked_inserts = PROBE_EVICT_INTERVAL
+
+
+def probe(path: Path) -> dict[str, Any]:
+    """Return ffprobe format, streams and chapters, cached by path, size and mtime."""
+    import ffmpeg  # type: ignore[import-untyped]
+
+    key = str(path.resolve())
+    stat = path.stat()
+
+    with _lock:
+        connection = _connect()
+        row = connection.execute(
+            "SELECT result FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (key, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+
+        if row:
+            connection.execute(
+                "UPDATE probes SET accessed = ? WHERE path = ?", (time.time(), key)
+            )
+            connection.commit()
+            return json.loads(row[0])
+
+    result: dict[str, Any] = ffmpeg.probe(key, show_chapters=None)
+    encoded = json.dumps(result)
+
+    with _lock:
+        connection = _connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                stat.st_size,
+                stat.st_mtime_ns,
+                encoded,
+                len(encoded),
+                time.time(),
+            ),
+        )
+        _evict(connection)
+        connection.commit()
+
+    return result
+
+
+def clear_probe_cache() -> None:
+    """Remove every cached probe result."""
+    with _lock:
+        connection = _connect()
+        connection.execute("DELETE FROM probes")
+        connection.commit()
+
+
+def _connect() -> sqlite3.Connection:
+    global _connection
+
+    if _connection is None:
+        PROBE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _connection = sqlite3.connect(PROBE_CACHE_PATH, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute("PRAGMA synchronous=NORMAL")
+
+        # Results are cheap to recompute, so older layouts are simply dropped
+        version = _connection.execute("PRAGMA user_version").fetchone()[0]
+
+        if version != PROBE_CACHE_VERSION:
+            _connection.execute("DROP TABLE IF EXISTS probes")
+            _connection.execute(f"PRAGMA user_version = {PROBE_CACHE_VERSION}")
+
+        _connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS probes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        _connection.execute(
+            "CREATE INDEX IF NOT EXISTS probes_accessed ON probes (accessed, bytes)"
+        )
+
+    return _connection
+
+
+def _reset_connection() -> None:
+    """Drop the inherited connection in a forked child, which must not reuse it."""
+    global _connection, _lock
+
+    _connection = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_connection)
+
+
+def _evict(connection: sqlite3.Connection) -> None:
+    """Drop least recently used entries once the cache exceeds its size cap.
+
+    The total is only summed every PROBE_EVICT_INTERVAL inserts, from the small
+    index on access time and size rather than the stored results.
+    """
+    global _unchecked_inserts
+
+    _unchecked_inserts += 1
+
+    if _unchecked_inserts < PROBE_EVICT_INTERVAL:
+        return
+
+    _unchecked_inserts = 0
+    total: int = connection.execute(
+        "SELECT COALESCE(SUM(bytes), 0) FROM probes"
+    ).fetchone()[0]
+
+    if total <= PROBE_CACHE_MAX_BYTES:
+        return
+
+    target = PROBE_CACHE_MAX_BYTES * 0.9
+    evicted: list[str] = []
+
+    for path, size in connection.execute(
+        "SELECT path, bytes FROM probes ORDER BY accessed"
+    ).fetchall():
+        if total <= target:
+            break
+        evicted.append(path)
+        total -= size
+
+    connection.executemany("DELETE FROM probes WHERE path = ?", [(p,) for p in evicted])
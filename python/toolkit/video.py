@@ -1,7 +1,17 @@
+import bisect
+import functools
 import io
+import os
 import random
 import subprocess
+import tempfile
 import textwrap
+import threading
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 from typing import TypedDict
 
@@ -9,8 +19,11 @@ import ffmpeg  # type: ignore[import-untyped]
 import pyperclip  # type: ignore[import-untyped]
 from PIL import Image, ImageDraw, ImageFont  # type: ignore[import-untyped]
 
-from toolkit.filesystem import run_command
+from toolkit.filesystem import run_command, run_parallel
+from toolkit.instrumentation import instrument, instrumented, tool_name
+from toolkit.jobs import complete, completed
 from toolkit.logging_config import get_logger
+from toolkit.probe import probe
 
 logger = get_logger("video")
 
@@ -26,13 +39,32 @@ HANDBRAKE_PATH = (
     r"C:\Users\Lance\AppData\Local\Personal\HandBrakeCLI 1.8.0\HandBrakeCLI.exe"
 )
 MAKEMKV_PATH = r"C:\Program Files (x86)\MakeMKV\makemkvcon64.exe"
-
-
+THUMBNAIL_OUTPUT_DIR = Path.home() / "Desktop"
+FULL_SIZE_IMAGE_COUNT = 12
+GIF_MIN_FPS = 10
+GIF_MIN_SCALE = 160
+GIF_SCALE_STEP = 40
+GIF_SAMPLE_SECONDS = 3
+GIF_DITHER_MODES = [
+    "sierra2_4a",
+    "sierra2",
+    "sierra3",
+    "floyd_steinberg",
+    "burkes",
+    "heckbert",
+    "bayer",
+    "none",
+]
+MAX_CONCURRENT_DECODES = 2
+# Carlito is metric-compatible with Calibri; the others are common on Linux
+FALLBACK_FONTS = ["Carlito-Regular.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf"]
+
+
+@instrumented
 def extract_chapters(video_files: list[Path]) -> None:
     """Extract individual chapters from video files."""
     for video_file in video_files:
-        probe = ffmpeg.probe(str(video_file), show_chapters=None)
-        chapters = probe.get("chapters", [])
+        chapters = probe(video_file).get("chapters", [])
 
         if len(chapters) <= 1:
             logger.info(f"No chapters in {video_file.name}")
@@ -47,16 +79,22 @@ def extract_chapters(video_files: list[Path]) -> None:
                 / f"{parent_directory.name} - Chapter {formatted_index}{video_file.suffix}"
             )
 
-            (
-                ffmpeg.input(
-                    str(video_file), ss=chapter["start_time"], to=chapter["end_time"]
+            with instrument("ffmpeg", "tool", stage="extract_chapters"):
+                (
+                    ffmpeg.input(
+                        str(video_file),
+                        ss=chapter["start_time"],
+                        to=chapter["end_time"],
+                    )
+                    .output(
+                        str(output_file_name), c="copy", avoid_negative_ts="make_zero"
+                    )
+                    .run(quiet=True)
                 )
-                .output(str(output_file_name), c="copy", avoid_negative_ts="make_zero")
-                .run(quiet=True)
-            )
             logger.info(f"Extracted chapter {formatted_index} from {video_file.name}")
 
 
+@instrumented
 def batch_compression(path: Path) -> None:
     """Batch compress MKV files using HandBrake."""
     mkv_files = list(path.rglob("*.mkv"))
@@ -73,7 +111,8 @@ def batch_compression(path: Path) -> None:
             str(output_file_path),
         ]
 
-        result = subprocess.run(command, capture_output=True, text=True)
+        with instrument(tool_name(command), "tool"):
+            result = subprocess.run(command, capture_output=True, text=True)
 
         if result.returncode == 0:
             file.unlink()
@@ -82,7 +121,10 @@ def batch_compression(path: Path) -> None:
             logger.error(f"Failed: {file.name}")
 
 
-def remux_disc(path: Path, fetch_mediainfo: bool = True) -> None:
+@instrumented
+def remux_disc(
+    path: Path, fetch_mediainfo: bool = True, extract_jobs: int = 1
+) -> None:
     """Remux DVD/Blu-ray discs to MKV using MakeMKV."""
     remuxable_files: list[Path] = [
         f
@@ -94,16 +136,26 @@ def remux_disc(path: Path, fetch_mediainfo: bool = True) -> None:
         raise FileNotFoundError(f"No remuxable files found in {path}")
 
     for file in remuxable_files:
+        if completed("remux", str(file)) is not None:
+            logger.info(f"Already remuxed: {file}")
+            continue
+
         logger.info(f"Converting: {file.name}")
         convert_disc_to_mkv(file, file.parent)
         logger.info(f"Converted: {file}")
 
         if fetch_mediainfo:
-            for mkv_file in path.glob("*.mkv"):
+            mkv_files = sorted(path.glob("*.mkv"))
+
+            for mkv_file in mkv_files:
                 get_mediainfo(mkv_file)
-                extract_images(mkv_file)
 
+            extract_images_batch(mkv_files, extract_jobs)
 
+        complete("remux", str(file))
+
+
+@instrumented
 def convert_disc_to_mkv(file: Path, dvd_folder: Path) -> None:
     """Convert disc to MKV using MakeMKV CLI."""
     makemkv_command = [
@@ -117,6 +169,7 @@ def convert_disc_to_mkv(file: Path, dvd_folder: Path) -> None:
     run_command(makemkv_command, cwd=str(dvd_folder))
 
 
+@instrumented
 def get_mediainfo(video_path: Path) -> None:
     """Get MediaInfo and copy to clipboard."""
     logger.info(f"Getting MediaInfo for {video_path.name}")
@@ -124,9 +177,12 @@ def get_mediainfo(video_path: Path) -> None:
         Path.home() / "Desktop" / f"{video_path.parent.name} - {video_path.name}.txt"
     )
 
-    result = subprocess.run(
-        ["mediainfo", "--Output=TXT", str(video_path)], capture_output=True, text=True
-    ).stdout
+    with instrument("mediainfo", "tool"):
+        result = subprocess.run(
+            ["mediainfo", "--Output=TXT", str(video_path)],
+            capture_output=True,
+            text=True,
+        ).stdout
     cleaned_result = result.replace("Lance\\", "")
 
     with open(output_file, "w") as f:
@@ -136,6 +192,7 @@ def get_mediainfo(video_path: Path) -> None:
     logger.info("MediaInfo generated")
 
 
+@instrumented
 def print_video_resolution(video_files: list[Path]) -> None:
     """Print resolution information for video files, grouped by HD status."""
     files_hd: list[str] = []
@@ -159,9 +216,9 @@ def print_video_resolution(video_files: list[Path]) -> None:
 
 
 def get_video_resolution(filepath: Path) -> dict[str, int] | None:
-    """Get video resolution using ffprobe."""
-    probe = ffmpeg.probe(str(filepath))
-    video_streams = [s for s in probe["streams"] if s["codec_type"] == "video"]
+    """Get video resolution using the cached ffprobe result."""
+    streams = probe(filepath)["streams"]
+    video_streams = [s for s in streams if s["codec_type"] == "video"]
 
     if not video_streams:
         return None
@@ -174,61 +231,143 @@ def get_video_resolution(filepath: Path) -> dict[str, int] | None:
 
 def get_video_info(video_path: Path) -> VideoInfo:
     """Get comprehensive video info (duration, width, height)."""
-    probe = ffmpeg.probe(
-        str(video_path),
-        v="error",
-        select_streams="v:0",
-        show_entries="format=duration,stream=width,height",
+    probe_result = probe(video_path)
+    video_stream = next(
+        s for s in probe_result["streams"] if s["codec_type"] == "video"
     )
     return {
-        "duration": float(probe["format"]["duration"]),
-        "width": int(probe["streams"][0]["width"]),
-        "height": int(probe["streams"][0]["height"]),
+        "duration": float(probe_result["format"]["duration"]),
+        "width": int(video_stream["width"]),
+        "height": int(video_stream["height"]),
     }
 
 
+@instrumented
 def create_gif_optimized(
-    input_path: Path, start: str, duration: int, max_size: int, output_dir: Path
+    input_path: Path,
+    start: str,
+    duration: int,
+    max_size: int,
+    output_dir: Path,
+    dither: str = "sierra2_4a",
 ) -> None:
-    """Create optimized GIF with automatic quality reduction to meet size target."""
+    """Create optimized GIF with automatic quality reduction to meet size target.
+
+    The segment is decoded once to a lossless intermediate that the palette and
+    every encode read from. A short sample encode estimates the size per frame
+    and pixel, which picks the candidate to encode by binary search. Each full
+    encode refines the estimate, so the GIF usually fits within two or three
+    encodes.
+    """
     if not input_path.is_file():
         raise FileNotFoundError(f"Input file not found: {input_path}")
 
+    if dither not in GIF_DITHER_MODES:
+        raise ValueError(f"Unknown dither mode: {dither}")
+
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    original_fps, original_width = get_video_info_for_gif(input_path)
-    fps = original_fps
-    scale = original_width
-    min_fps = 10
-    min_scale = 160
+    candidates = gif_candidates(*get_video_info_for_gif(input_path))
+    timestamp = start.replace(":", "")
+    output_path = output_dir / f"{input_path.stem} - {timestamp} - {duration}.gif"
+    too_big, fits = -1, len(candidates)
 
-    while True:
-        timestamp = start.replace(":", "")
-        output_name = f"{input_path.stem} - {timestamp} - {duration}.gif"
-        output_path = output_dir / output_name
+    def predicted(candidate: tuple[float, int]) -> float:
+        # Height follows width, so size scales with frames times width squared
+        fps, scale = candidate
+        return rate * fps * duration * scale**2
 
-        size = create_gif(input_path, start, duration, output_path, fps, scale)
+    with tempfile.TemporaryDirectory(prefix=".gif-", dir=output_dir) as work:
+        work_dir = Path(work)
+        segment_path = decode_segment(
+            input_path, start, duration, work_dir / "segment.mkv"
+        )
+        fps, scale = candidates[0]
+        palette_path = create_palette(
+            segment_path, "0", duration, work_dir / "palette.png", fps, scale
+        )
+        sample_seconds = min(duration, GIF_SAMPLE_SECONDS)
+        size = create_gif(
+            segment_path,
+            "0",
+            sample_seconds,
+            work_dir / "0.gif",
+            fps,
+            scale,
+            palette_path,
+            dither,
+        )
+        rate = size / (fps * sample_seconds * scale**2)
+
+        if sample_seconds == duration:
+            too_big, fits = (-1, 0) if size <= max_size else (0, len(candidates))
+
+        while too_big + 1 < fits:
+            index = bisect.bisect_left(
+                candidates,
+                True,
+                too_big + 1,
+                fits,
+                key=lambda c: predicted(c) <= max_size,
+            )
+
+            if index == fits:
+                if fits < len(candidates):
+                    break
+                index = fits - 1
 
-        if size <= max_size:
+            fps, scale = candidates[index]
+            logger.info(
+                f"Trying {fps:.2f} fps at {scale}px "
+                f"(predicted {predicted(candidates[index]):.2f} MiB)"
+            )
+            size = create_gif(
+                segment_path,
+                "0",
+                duration,
+                work_dir / f"{index}.gif",
+                fps,
+                scale,
+                palette_path,
+                dither,
+            )
+            rate = size / (fps * duration * scale**2)
+
+            if size <= max_size:
+                fits = index
+            else:
+                too_big = index
+
+        if fits < len(candidates):
             logger.info("GIF created successfully")
-            break
-
-        if fps > min_fps:
-            fps -= 1
-            logger.info(f"Reducing FPS to {fps}")
-        elif scale > min_scale:
-            scale = max(scale - 40, min_scale)
-            logger.info(f"Reducing scale to {scale}")
+            os.replace(work_dir / f"{fits}.gif", output_path)
         else:
             logger.warning("Cannot compress further")
-            break
+            os.replace(work_dir / f"{too_big}.gif", output_path)
+
+
+def gif_candidates(fps: float, width: int) -> list[tuple[float, int]]:
+    """List frame rate and width pairs to try, from best quality to smallest.
+
+    Frame rate drops one step at a time to the minimum before width does.
+    """
+    candidates = [(fps, width)]
+
+    while fps > GIF_MIN_FPS:
+        fps -= 1
+        candidates.append((fps, width))
+
+    while width > GIF_MIN_SCALE:
+        width = max(width - GIF_SCALE_STEP, GIF_MIN_SCALE)
+        candidates.append((fps, width))
+
+    return candidates
 
 
 def get_video_info_for_gif(input_path: Path) -> tuple[float, int]:
     """Get FPS and width for GIF creation."""
-    probe = ffmpeg.probe(str(input_path))
     video_stream = next(
-        (s for s in probe["streams"] if s["codec_type"] == "video"), None
+        (s for s in probe(input_path)["streams"] if s["codec_type"] == "video"), None
     )
 
     if not video_stream:
@@ -240,6 +379,44 @@ def get_video_info_for_gif(input_path: Path) -> tuple[float, int]:
     return fps, width
 
 
+def decode_segment(
+    input_path: Path, start: str, duration: int, segment_path: Path
+) -> Path:
+    """Decode a segment's video once to lossless FFV1 for repeated GIF encodes."""
+    with instrument("ffmpeg", "tool", stage="decode_segment"):
+        (
+            ffmpeg.input(str(input_path), ss=start, t=duration)
+            .video.output(str(segment_path), vcodec="ffv1")
+            .overwrite_output()
+            .run(quiet=True)
+        )
+
+    return segment_path
+
+
+def create_palette(
+    input_path: Path,
+    start: str,
+    duration: int,
+    palette_path: Path,
+    fps: float,
+    scale: int,
+) -> Path:
+    """Generate a GIF palette for a segment, shared by every candidate encode."""
+    with instrument("ffmpeg", "tool", stage="palettegen"):
+        (
+            ffmpeg.input(str(input_path), ss=start, t=duration)
+            .filter("fps", fps=fps)
+            .filter("scale", scale, -1, flags="lanczos")
+            .filter("palettegen")
+            .output(str(palette_path))
+            .overwrite_output()
+            .run(quiet=True)
+        )
+
+    return palette_path
+
+
 def create_gif(
     input_path: Path,
     start: str,
@@ -247,35 +424,170 @@ def create_gif(
     output_path: Path,
     fps: float,
     scale: int,
+    palette_path: Path | None = None,
+    dither: str = "sierra2_4a",
 ) -> float:
-    """Create a single GIF and return its size in MiB."""
-    (
+    """Create a single GIF and return its size in MiB.
+
+    With a palette, frames are mapped to it with the given dithering, and only
+    the rectangle that changed since the previous frame is reprocessed.
+    """
+    video = (
         ffmpeg.input(str(input_path), ss=start, t=duration)
         .filter("fps", fps=fps)
         .filter("scale", scale, -1, flags="lanczos")
-        .output(str(output_path), format="gif", gifflags="+transdiff", y=True)
-        .run(quiet=True)
     )
 
+    if palette_path is not None:
+        video = ffmpeg.filter(
+            [video, ffmpeg.input(str(palette_path))],
+            "paletteuse",
+            dither=dither,
+            diff_mode="rectangle",
+        )
+
+    with instrument("ffmpeg", "tool", stage="create_gif"):
+        (
+            video.output(str(output_path), format="gif", gifflags="+transdiff")
+            .overwrite_output()
+            .run(quiet=True)
+        )
+
     size = output_path.stat().st_size / (1024 * 1024)
     logger.info(f"GIF: {output_path.name} ({size:.2f} MiB)")
     return size
 
 
-def extract_images(video_path: Path) -> None:
-    """Extract thumbnail grid and full-size images from video."""
+@instrumented
+def extract_images(
+    video_path: Path,
+    output_dir: Path = THUMBNAIL_OUTPUT_DIR,
+    decode_slots: threading.Semaphore | None = None,
+) -> None:
+    """Extract thumbnail grid and full-size images from video.
+
+    Each of the two ffmpeg decodes holds one of decode_slots while it runs.
+    """
     logger.info(f"Extracting images from {video_path.name}")
 
     if not video_path.is_file():
         raise ValueError("Invalid file path")
 
     video_info = get_video_info(video_path)
-    thumbnail_timestamps = create_thumbnail_grid(video_path, video_info)
-    save_full_size_images(video_path, video_info, thumbnail_timestamps)
+
+    with decode_slots or nullcontext():
+        thumbnail_timestamps = create_thumbnail_grid(video_path, video_info, output_dir)
+
+    with decode_slots or nullcontext():
+        save_full_size_images(video_path, video_info, thumbnail_timestamps, output_dir)
 
     logger.info("Images extracted")
 
 
+@instrumented
+def extract_images_batch(
+    video_files: list[Path],
+    jobs: int = 1,
+    output_dir: Path = THUMBNAIL_OUTPUT_DIR,
+    max_decoders: int = MAX_CONCURRENT_DECODES,
+) -> None:
+    """Extract images for many videos concurrently, skipping up-to-date ones.
+
+    Videos are handled on up to jobs workers, but only max_decoders ffmpeg
+    processes decode frames at a time. Each one decodes every seek point of a
+    video at full resolution, so memory grows with max_decoders, not jobs.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pending = [v for v in video_files if not images_up_to_date(v, output_dir)]
+
+    if skipped := len(video_files) - len(pending):
+        logger.info(f"Skipping {skipped} videos whose images are up to date")
+
+    if not pending:
+        return
+
+    failures = run_parallel(
+        partial(
+            extract_images,
+            output_dir=output_dir,
+            decode_slots=threading.BoundedSemaphore(max(1, max_decoders)),
+        ),
+        pending,
+        jobs,
+        f"Extracting images from {len(pending)} videos with {jobs} worker(s)",
+    )
+
+    if failures:
+        logger.error(f"{len(failures)} of {len(pending)} videos failed")
+
+
+def image_outputs(
+    video_path: Path, output_dir: Path = THUMBNAIL_OUTPUT_DIR
+) -> list[Path]:
+    """Return the thumbnail grid and full-size image paths for a video."""
+    return [output_dir / f"{video_path.stem} - Thumbnails.jpg"] + [
+        output_dir / f"{video_path.stem} - Image {idx + 1}.jpg"
+        for idx in range(FULL_SIZE_IMAGE_COUNT)
+    ]
+
+
+def images_up_to_date(
+    video_path: Path, output_dir: Path = THUMBNAIL_OUTPUT_DIR
+) -> bool:
+    """Check every image for a video exists and is newer than the video."""
+    source_mtime = video_path.stat().st_mtime_ns
+    return all(
+        output.exists() and output.stat().st_mtime_ns >= source_mtime
+        for output in image_outputs(video_path, output_dir)
+    )
+
+
+def save_image(image: Image.Image, output_path: Path) -> None:
+    """Save a JPEG via a temporary file, so an interrupted save never looks done."""
+    partial_path = output_path.with_name(f".{output_path.name}.partial")
+    image.save(partial_path, format="JPEG")
+    os.replace(partial_path, output_path)
+
+
+@dataclass
+class DigitAtlas:
+    """Prerendered masks of the characters a timestamp overlay can contain."""
+
+    glyphs: dict[str, Image.Image]
+    advances: dict[str, int]
+    height: int
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(
+    font_path: str, font_size: int
+) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """Load a font once per path and size, falling back where Calibri is missing."""
+    for candidate in [font_path, *FALLBACK_FONTS]:
+        try:
+            return ImageFont.truetype(candidate, font_size)
+        except OSError:
+            continue
+
+    return ImageFont.load_default(font_size)
+
+
+@functools.lru_cache(maxsize=None)
+def digit_atlas(font_path: str, font_size: int) -> DigitAtlas:
+    """Render the digits and colon once, for stamping without touching the font."""
+    font = load_font(font_path, font_size)
+    glyphs: dict[str, Image.Image] = {}
+    advances: dict[str, int] = {}
+
+    for char in "0123456789:":
+        right, bottom = font.getbbox(char)[2:]
+        advances[char] = round(font.getlength(char))
+        glyphs[char] = Image.new("L", (int(max(right, advances[char])), int(bottom)))
+        ImageDraw.Draw(glyphs[char]).text((0, 0), char, font=font, fill=255)
+
+    return DigitAtlas(glyphs, advances, max(g.height for g in glyphs.values()))
+
+
 def add_timestamp(
     image: Image.Image,
     timestamp: float,
@@ -283,66 +595,133 @@ def add_timestamp(
     font_size: int = 20,
 ) -> Image.Image:
     """Add timestamp overlay to image."""
-    draw = ImageDraw.Draw(image)
-    font = ImageFont.truetype(font_path, font_size)
+    atlas = digit_atlas(font_path, font_size)
     timestamp_text = f"{int(timestamp // 60):02}:{int(timestamp % 60):02}"
 
-    text_width, text_height = font.getbbox(timestamp_text)[2:]
-    text_position = (image.width - text_width - 20, image.height - text_height - 20)
-    draw.text(text_position, timestamp_text, font=font, fill=(255, 255, 255, 255))
+    text_width = sum(atlas.advances[char] for char in timestamp_text)
+    x = image.width - text_width - 20
+    y = image.height - atlas.height - 20
+
+    for char in timestamp_text:
+        image.paste((255, 255, 255), (x, y), atlas.glyphs[char])
+        x += atlas.advances[char]
+
     return image
 
 
-def extract_frame(
+def extract_frames(
     video_path: Path,
-    timestamp: float,
+    timestamps: list[int],
     video_info: VideoInfo,
     target_width: int | None = None,
-) -> Image.Image:
-    """Extract a single frame from video at specified timestamp."""
-    input_stream = ffmpeg.input(str(video_path), ss=timestamp)
+) -> Iterator[tuple[int, Image.Image]]:
+    """Yield timestamped frames at each timestamp, decoded by one ffmpeg process.
+
+    Every timestamp is its own input-seeked copy of the video, trimmed to one
+    frame and concatenated into a raw RGB stream, so only a few frames around
+    each seek point are decoded and nothing is re-encoded as JPEG.
+    """
+    width, height = video_info["width"], video_info["height"]
+
     if target_width:
-        aspect_ratio = video_info["height"] / video_info["width"]
-        target_height = int(target_width * aspect_ratio)
-        input_stream = input_stream.filter("scale", target_width, target_height)
+        aspect_ratio = height / width
+        width, height = target_width, int(target_width * aspect_ratio)
+
+    unique = list(dict.fromkeys(timestamps))
+    repeated = {t for t, count in Counter(timestamps).items() if count > 1}
+    segments = [
+        ffmpeg.input(str(video_path), ss=timestamp)
+        .video.filter("trim", end_frame=1)
+        .filter("setpts", "PTS-STARTPTS")
+        .filter("scale", width, height)
+        .filter("setsar", 1)
+        for timestamp in unique
+    ]
+    process = (
+        ffmpeg.concat(*segments, v=1, a=0)
+        .output("pipe:", format="rawvideo", pix_fmt="rgb24", fps_mode="passthrough")
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    frame = bytearray(width * height * 3)
+    decoded: dict[int, Image.Image] = {}
+
+    try:
+        with instrument("ffmpeg", "tool", stage="extract_frames", frames=len(unique)):
+            for timestamp in timestamps:
+                if timestamp in decoded:
+                    yield timestamp, decoded[timestamp]
+                    continue
 
-    out, _ = input_stream.output(
-        "pipe:", vframes=1, format="image2", vcodec="mjpeg"
-    ).run(capture_stdout=True, capture_stderr=True)
-    img = Image.open(io.BytesIO(out))
-    return add_timestamp(img, timestamp)
+                if not _read_frame(process.stdout, frame):
+                    _, error = process.communicate()
+                    raise ffmpeg.Error("ffmpeg", None, error)
+
+                image = Image.frombytes("RGB", (width, height), frame)
+                image = add_timestamp(image, timestamp)
+
+                if timestamp in repeated:
+                    decoded[timestamp] = image
+
+                yield timestamp, image
+
+            process.communicate()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.communicate()
+
+
+def _read_frame(stream: io.BufferedReader, frame: bytearray) -> bool:
+    """Fill frame from stream, returning False if the stream ends first."""
+    view = memoryview(frame)
+    filled = 0
+
+    while filled < len(frame):
+        count = stream.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+
+    return True
 
 
 def add_filename_to_header(
     draw: ImageDraw.ImageDraw, filename: str, header_size: int, image_width: int
 ) -> None:
     """Add filename header to thumbnail grid."""
-    font = ImageFont.truetype("calibri.ttf", 60)
+    font_size = 60
+    font = load_font("calibri.ttf", font_size)
     text_lines = textwrap.wrap(filename, width=40)
 
     draw.rectangle([(0, 0), (image_width, header_size)], fill=(240, 240, 240))
 
-    y_offset = (header_size - (len(text_lines) * (font.size + 5))) // 2
+    y_offset = (header_size - (len(text_lines) * (font_size + 5))) // 2
     for line in text_lines:
         text_width, _ = font.getbbox(line)[2:]
         text_position = ((image_width - text_width) // 2, y_offset)
         draw.text(text_position, line, font=font, fill=(0, 0, 0, 255))
-        y_offset += font.size + 5
+        y_offset += font_size + 5
 
 
+@instrumented
 def create_thumbnail_grid(
     video_path: Path,
     video_info: VideoInfo,
+    output_dir: Path = THUMBNAIL_OUTPUT_DIR,
     width: int = 800,
     rows: int = 8,
     columns: int = 4,
 ) -> list[int]:
     """Create a grid of thumbnails from video."""
-    output_path = Path.home() / "Desktop" / f"{video_path.stem} - Thumbnails.jpg"
+    output_path = image_outputs(video_path, output_dir)[0]
     duration = video_info["duration"]
     timestamps = [int(duration * i / (rows * columns)) for i in range(rows * columns)]
 
-    if output_path.exists():
+    if (
+        output_path.exists()
+        and output_path.stat().st_mtime_ns >= video_path.stat().st_mtime_ns
+    ):
         logger.info(f"Thumbnail exists: {output_path.name}")
         return timestamps
 
@@ -356,21 +735,25 @@ def create_thumbnail_grid(
 
     add_filename_to_header(draw, video_path.stem, 100, grid_width)
 
-    for idx, timestamp in enumerate(timestamps):
-        img = extract_frame(video_path, timestamp, video_info, width)
-        if img:
-            col = idx % columns
-            row = idx // columns
-            x = col * width
-            y = 100 + row * target_height
-            grid_image.paste(img, (x, y))
+    frames = extract_frames(video_path, timestamps, video_info, width)
+
+    for idx, (_, img) in enumerate(frames):
+        col = idx % columns
+        row = idx // columns
+        x = col * width
+        y = 100 + row * target_height
+        grid_image.paste(img, (x, y))
 
-    grid_image.save(output_path)
+    save_image(grid_image, output_path)
     return timestamps
 
 
+@instrumented
 def save_full_size_images(
-    video_path: Path, video_info: VideoInfo, thumbnail_timestamps: list[int]
+    video_path: Path,
+    video_info: VideoInfo,
+    thumbnail_timestamps: list[int],
+    output_dir: Path = THUMBNAIL_OUTPUT_DIR,
 ) -> None:
     """Save random full-size images from video, excluding thumbnail timestamps."""
     duration = video_info["duration"]
@@ -378,10 +761,12 @@ def save_full_size_images(
 
     possible_timestamps = sorted(
         random.sample(
-            [t for t in range(int(duration)) if t not in thumbnail_timestamps_set], 12
+            [t for t in range(int(duration)) if t not in thumbnail_timestamps_set],
+            FULL_SIZE_IMAGE_COUNT,
         )
     )
 
-    for idx, timestamp in enumerate(possible_timestamps):
-        img = extract_frame(video_path, timestamp, video_info)
-        img.save(Path.home() / "Desktop" / f"{video_path.stem} - Image {idx + 1}.jpg")
+    frames = extract_frames(video_path, possible_timestamps, video_info)
+
+    for (_, img), output_path in zip(frames, image_outputs(video_path, output_dir)[1:]):
+        save_image(img, output_path)